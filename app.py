@@ -5,25 +5,38 @@ from src.pages.comp_ind_strat import (
     comparing_investment_strategies_page,
 )
 from src.pages.core_portfolios import examine_core_portfolios_page
+from src.pages.debug import debug_enabled, debug_panel, profile_requested
+from src.services.tracing import profile, span, trace
 
 st.set_page_config(layout="wide")
 
-strategy_tab, core_portf_tab, ai_tab = st.tabs(
-    [
-        "Comparing Investment Strategies",
-        "Core portfolios",
-        "AI Chatbot",
-    ]
+# Only the selected page runs, so a rerun pays for the visible page alone.
+pages = {
+    "Comparing Investment Strategies": comparing_investment_strategies_page,
+    "Core portfolios": examine_core_portfolios_page,
+    "AI Chatbot": ai_page,
+}
+page = st.segmented_control(
+    "Page",
+    list(pages),
+    default=next(iter(pages)),
+    key="page",
+    label_visibility="collapsed",
 )
 
 
-st.session_state["current_investment_strategies"] = {}
-st.session_state["core_portfolios"] = {}
+# Results of pages visited earlier in the session stay available to the chatbot.
+st.session_state.setdefault("current_investment_strategies", {})
+st.session_state.setdefault("core_portfolios", {})
 
 
-with strategy_tab:
-    comparing_investment_strategies_page()
-with core_portf_tab:
-    examine_core_portfolios_page()
-with ai_tab:
-    ai_page()
+page = page or next(iter(pages))
+with (
+    trace() as rerun_trace,
+    profile(enabled=debug_enabled() and profile_requested()) as profile_report,
+    span(f"page:{page}"),
+):
+    pages[page]()
+
+if debug_enabled():
+    debug_panel(rerun_trace, profile_report)
@@ -0,0 +1,84 @@
+"""
+Compares ``strategy.risk_parity_weights`` with the SLSQP solver it replaced.
+
+Run with ``python -m benchmarks.risk_parity``.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+from src.services.strategy import risk_parity_weights
+
+# The legacy solver is slow enough past a few dozen assets to be skipped there.
+LEGACY_MAX_ASSETS = 100
+
+
+def legacy_risk_parity(cov_matrix: pd.DataFrame) -> np.ndarray:
+    def risk_parity_objective(weights: pd.DataFrame, cov_matrix: pd.DataFrame):
+        variance = weights @ cov_matrix @ weights.T
+        marginal_contribution = cov_matrix @ weights
+        risk_contribution = np.multiply(weights, marginal_contribution) / variance
+        target_risk = np.mean(risk_contribution)
+        return np.sum((risk_contribution - target_risk) ** 2)
+
+    weights = np.ones(len(cov_matrix)) / len(cov_matrix)
+
+    return minimize(
+        risk_parity_objective,
+        weights,
+        args=(cov_matrix,),
+        method="SLSQP",
+        bounds=[(0, 1)] * len(cov_matrix),
+        constraints={"type": "eq", "fun": lambda x: np.sum(x) - 1},
+    ).x
+
+
+def synthetic_cov(n_assets: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Annualized sample covariance of correlated synthetic daily returns."""
+    loadings = rng.normal(size=(n_assets, 3))
+    returns = (
+        rng.normal(size=(2520, 3)) @ loadings.T + rng.normal(size=(2520, n_assets))
+    ) * 0.005
+    return pd.DataFrame(np.cov(returns, rowvar=False) * 252)
+
+
+def risk_contribution_spread(weights: np.ndarray, cov_matrix: np.ndarray) -> float:
+    contribution = weights * (cov_matrix @ weights)
+    contribution /= contribution.sum()
+    return float(contribution.max() - contribution.min())
+
+
+def timed(func, *args, repeat: int = 3) -> tuple[float, np.ndarray]:
+    best, result = np.inf, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(sizes: tuple[int, ...] = (3, 10, 50, 100, 250, 500)) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    rows = []
+    for n_assets in sizes:
+        cov_df = synthetic_cov(n_assets, rng)
+        cov = cov_df.to_numpy()
+        row = {"assets": n_assets}
+
+        row["newton_s"], weights = timed(risk_parity_weights, cov)
+        row["newton_rc_spread"] = risk_contribution_spread(weights, cov)
+
+        if n_assets <= LEGACY_MAX_ASSETS:
+            row["slsqp_s"], legacy = timed(legacy_risk_parity, cov_df, repeat=1)
+            row["slsqp_rc_spread"] = risk_contribution_spread(legacy, cov)
+            row["max_weight_diff"] = float(np.abs(weights - legacy).max())
+        rows.append(row)
+
+    return pd.DataFrame(rows).set_index("assets")
+
+
+if __name__ == "__main__":
+    print(main().to_string())
@@ -0,0 +1,316 @@
+"""
+Times the services layer on synthetic prices and compares with a baseline.
+
+Each case is measured at a base size and along one dimension at a time
+(tickers, days of history, simulations), cold: the fit and result caches are
+emptied before every call. Wall time is the best of ``--repeat`` calls, peak
+memory is what ``tracemalloc`` sees during one call, which includes NumPy
+buffers but not worker processes, so the cases run in-process.
+
+Run with ``python -m benchmarks.services``. ``--save-baseline`` stores the
+results; later runs exit with status 1 when a case is slower or uses more
+memory than the stored baseline by more than ``--tolerance``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_prices, synthetic_weights
+from src.services.covariance import COVARIANCE_METHODS, estimate_covariance
+from src.services.fit_cache import fit_cache
+from src.services.frontier import efficient_frontier
+from src.services.metrics import calculate_batch_performance_metrics
+from src.services.monte_carlo import (
+    get_simulated_compact_cube,
+    get_simulated_cube,
+    get_simulated_prices,
+    get_stats,
+)
+from src.services.result_cache import result_cache
+from src.services.strategy import (
+    STRATEGIES,
+    build_context,
+    calculate_performance_metrics,
+    strategy,
+)
+
+BASE = {"tickers": 5, "days": 2520, "simulations": 1000}
+SWEEPS = {
+    "tickers": (3, 5, 10, 25),
+    "days": (1260, 2520, 5040),
+    "simulations": (250, 1000, 4000),
+}
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+# Timings below this are too noisy to flag as regressions.
+MIN_SECONDS = 0.01
+MIN_PEAK_MB = 1.0
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    dimensions: tuple[str, ...]
+    # Builds the inputs, outside the measurement, and returns the call to measure.
+    prepare: Callable[[dict, np.random.Generator], Callable[[], object]]
+
+
+def _simulated_prices(size: dict, rng: np.random.Generator) -> Callable:
+    price_df = synthetic_prices(1, size["days"], rng)
+    return lambda: get_simulated_prices(price_df, size["simulations"], seed=0)
+
+
+def _simulated_cube(size: dict, rng: np.random.Generator) -> Callable:
+    price_df = synthetic_prices(size["tickers"], size["days"], rng)
+    return lambda: get_simulated_cube(
+        price_df, size["simulations"], seed=0, max_workers=1
+    )
+
+
+def _simulated_compact_cube(size: dict, rng: np.random.Generator) -> Callable:
+    price_df = synthetic_prices(size["tickers"], size["days"], rng)
+    return lambda: get_simulated_compact_cube(
+        price_df, size["simulations"], seed=0, max_workers=1
+    )
+
+
+def _stats(simulate: Callable) -> Callable:
+    def prepare(size: dict, rng: np.random.Generator) -> Callable:
+        price_df = synthetic_prices(size["tickers"], BASE["days"], rng)
+        cube = simulate(price_df, size["simulations"], seed=0, max_workers=1)
+        weights = synthetic_weights(price_df.columns, len(STRATEGIES), rng)
+        return lambda: get_stats(cube, weights)
+
+    return prepare
+
+
+def _strategy(type_: str, covariance: str = "sample") -> Callable:
+    def prepare(size: dict, rng: np.random.Generator) -> Callable:
+        price_df = synthetic_prices(size["tickers"], size["days"], rng)
+        return lambda: strategy(
+            price_df, type_, context=build_context(price_df, covariance)
+        )
+
+    return prepare
+
+
+def _covariance(method: str) -> Callable:
+    def prepare(size: dict, rng: np.random.Generator) -> Callable:
+        daily_returns = synthetic_prices(size["tickers"], size["days"], rng)
+        daily_returns = daily_returns.pct_change().dropna()
+        return lambda: estimate_covariance(daily_returns, method)
+
+    return prepare
+
+
+def _efficient_frontier(size: dict, rng: np.random.Generator) -> Callable:
+    price_df = synthetic_prices(size["tickers"], size["days"], rng)
+    return lambda: efficient_frontier(price_df, n_points=200)
+
+
+def _performance_metrics(size: dict, rng: np.random.Generator) -> Callable:
+    price_df = synthetic_prices(size["tickers"], size["days"], rng)
+    weights = synthetic_weights(price_df.columns, 1, rng).T
+    return lambda: calculate_performance_metrics(price_df, weights)
+
+
+def _batch_performance_metrics(size: dict, rng: np.random.Generator) -> Callable:
+    price_df = synthetic_prices(size["tickers"], size["days"], rng)
+    weights = synthetic_weights(price_df.columns, 1000, rng)
+    return lambda: calculate_batch_performance_metrics(price_df, weights)
+
+
+CASES = [
+    Case("get_simulated_prices", ("days", "simulations"), _simulated_prices),
+    Case("get_simulated_cube", ("tickers", "days", "simulations"), _simulated_cube),
+    Case(
+        "get_simulated_compact_cube",
+        ("tickers", "days", "simulations"),
+        _simulated_compact_cube,
+    ),
+    Case("get_stats", ("tickers", "simulations"), _stats(get_simulated_cube)),
+    Case(
+        "get_stats[compact]",
+        ("tickers", "simulations"),
+        _stats(get_simulated_compact_cube),
+    ),
+    *(
+        Case(f"strategy:{type_}", ("tickers", "days"), _strategy(type_))
+        for type_ in STRATEGIES
+    ),
+    *(
+        Case(f"strategy:{type_}[factor]", ("tickers",), _strategy(type_, "factor"))
+        for type_ in ("min_volatility", "risk_parity")
+    ),
+    *(
+        Case(f"estimate_covariance[{method}]", ("tickers", "days"), _covariance(method))
+        for method in COVARIANCE_METHODS
+    ),
+    Case("efficient_frontier[200]", ("tickers", "days"), _efficient_frontier),
+    Case("calculate_performance_metrics", ("tickers", "days"), _performance_metrics),
+    Case(
+        "calculate_batch_performance_metrics[1000]",
+        ("tickers", "days"),
+        _batch_performance_metrics,
+    ),
+]
+
+
+def _sizes(case: Case, quick: bool) -> list[dict]:
+    if quick:
+        return [BASE]
+    sizes = []
+    for dimension in case.dimensions:
+        for value in SWEEPS[dimension]:
+            size = BASE | {dimension: value}
+            if size not in sizes:
+                sizes.append(size)
+    return sizes
+
+
+def _key(case: Case, size: dict) -> str:
+    return f"{case.name}({', '.join(f'{d}={size[d]}' for d in case.dimensions)})"
+
+
+def _cold_caches() -> None:
+    fit_cache.clear()
+    result_cache.clear()
+
+
+def measure(call: Callable[[], object], repeat: int) -> tuple[float, float]:
+    """Best wall time in seconds over ``repeat`` cold calls, and peak MiB of one."""
+    _cold_caches()
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = np.inf
+    for _ in range(repeat):
+        _cold_caches()
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return best, peak / 2**20
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(cases: list[Case], quick: bool, repeat: int) -> pd.DataFrame:
+    rows = {}
+    for case in cases:
+        for size in _sizes(case, quick):
+            key = _key(case, size)
+            call = case.prepare(size, np.random.default_rng(0))
+            seconds, peak_mb = measure(call, repeat)
+            rows[key] = {"seconds": seconds, "peak_mb": peak_mb}
+            print(f"{key}: {seconds:.4f}s, {peak_mb:.1f} MiB", file=sys.stderr)
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def compare(results: pd.DataFrame, baseline: dict, tolerance: float) -> pd.DataFrame:
+    """
+    Adds the baseline and the ratio to it for every case, and a ``regression``
+    column flagging cases slower or larger than ``1 + tolerance`` times the
+    baseline.
+    """
+    base = pd.DataFrame.from_dict(baseline["results"], orient="index").reindex(
+        results.index
+    )
+    report = results.assign(
+        baseline_seconds=base["seconds"],
+        time_ratio=results["seconds"] / base["seconds"].clip(lower=MIN_SECONDS),
+        baseline_peak_mb=base["peak_mb"],
+        memory_ratio=results["peak_mb"] / base["peak_mb"].clip(lower=MIN_PEAK_MB),
+    )
+    slower = (report["time_ratio"] > 1 + tolerance) & (report["seconds"] > MIN_SECONDS)
+    larger = (report["memory_ratio"] > 1 + tolerance) & (
+        report["peak_mb"] > MIN_PEAK_MB
+    )
+    return report.assign(regression=slower | larger)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.services")
+    parser.add_argument(
+        "--cases", nargs="*", help="only run cases whose name starts with these"
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="only measure the base size"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store these results as the baseline instead of comparing",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    cases = [
+        case
+        for case in CASES
+        if not args.cases or case.name.startswith(tuple(args.cases))
+    ]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fit_cache.directory = Path(cache_dir, "fits")
+        result_cache.directory = Path(cache_dir, "results")
+        results = run(cases, args.quick, args.repeat)
+
+    if args.save_baseline:
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "environment": environment(),
+                    "results": results.to_dict(orient="index"),
+                },
+                indent=2,
+            )
+        )
+        print(results.to_string())
+        return 0
+
+    if not args.baseline.exists():
+        print(results.to_string())
+        print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline["environment"] != environment():
+        print(
+            "Baseline recorded on a different environment: "
+            f"{baseline['environment']} vs {environment()}"
+        )
+    report = compare(results, baseline, args.tolerance)
+    print(report.to_string(float_format="{:.4g}".format))
+    regressions = report.index[report["regression"]]
+    if len(regressions):
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for key in regressions:
+            print(f"  {key}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_prices(
+    n_tickers: int,
+    n_days: int,
+    rng: np.random.Generator,
+    n_factors: int = 3,
+    end_date: str = "2024-12-31",
+) -> pd.DataFrame:
+    """
+    Business-day prices of ``n_tickers`` correlated assets, driven by a few
+    common factors, with volatility clustering so GARCH fits are meaningful.
+    """
+    loadings = rng.normal(scale=0.6, size=(n_tickers, n_factors))
+    factors = rng.standard_t(df=5, size=(n_days, n_factors))
+    idiosyncratic = rng.standard_t(df=5, size=(n_days, n_tickers))
+
+    # A shared GARCH(1,1)-like variance path scales every asset's shocks.
+    shocks = rng.standard_normal(n_days)
+    variance = np.empty(n_days)
+    variance[0] = 1.0
+    for day in range(1, n_days):
+        variance[day] = 0.05 + 0.08 * shocks[day - 1] ** 2 + 0.87 * variance[day - 1]
+
+    returns = 0.0003 + 0.006 * np.sqrt(variance)[:, None] * (
+        factors @ loadings.T + idiosyncratic
+    )
+    prices = 100 * np.exp(np.cumsum(returns, axis=0))
+    index = pd.bdate_range(end=end_date, periods=n_days, name="Date")
+    columns = [f"T{ticker:03d}" for ticker in range(n_tickers)]
+    return pd.DataFrame(prices, index=index, columns=columns)
+
+
+def synthetic_weights(
+    tickers: pd.Index, n_portfolios: int, rng: np.random.Generator
+) -> pd.DataFrame:
+    """Random long-only weights of shape ``(tickers, portfolios)``."""
+    weights = rng.dirichlet(np.ones(len(tickers)), size=n_portfolios).T
+    return pd.DataFrame(
+        weights, index=tickers, columns=[f"P{i}" for i in range(n_portfolios)]
+    )
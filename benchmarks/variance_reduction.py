@@ -0,0 +1,103 @@
+"""
+Measures the variance reduction options of ``simulate_stats`` and checks its
+standard errors against the spread they are meant to predict.
+
+Every option is run over ``--seeds`` seeds on the same synthetic prices and
+random portfolios. For each statistic and portfolio, the empirical standard
+deviation across seeds is compared with the mean reported ``<name>_se``, and
+the empirical variance with that of plain Monte Carlo. The tables give the
+median over portfolios and, for the standard errors, the worst portfolio. A
+ratio is infinite where no seed saw the event of a probability.
+
+Run with ``python -m benchmarks.variance_reduction``.
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_prices, synthetic_weights
+from src.services.fit_cache import fit_cache
+from src.services.monte_carlo import simulate_stats
+from src.services.result_cache import result_cache
+
+OPTIONS = {
+    "none": (),
+    "antithetic": ("antithetic",),
+    "stratified": ("stratified",),
+    "control_variate": ("control_variate",),
+    "all": ("antithetic", "stratified", "control_variate"),
+}
+
+
+def runs(
+    price_df: pd.DataFrame,
+    weights: pd.DataFrame,
+    variance_reduction: tuple[str, ...],
+    n_seeds: int,
+    n_simulations: int,
+) -> list[pd.DataFrame]:
+    return [
+        simulate_stats(
+            price_df,
+            weights,
+            n_simulations=n_simulations,
+            seed=seed,
+            max_workers=1,
+            variance_reduction=variance_reduction,
+        )
+        for seed in range(n_seeds)
+    ]
+
+
+def summary(results: dict[str, list[pd.DataFrame]]) -> pd.DataFrame:
+    """Variance reduction factors and standard error calibration per statistic."""
+    names = [
+        name
+        for name in results["none"][0].index
+        if f"{name}_se" in results["none"][0].index
+    ]
+    spread = {
+        option: pd.concat(frames).groupby(level=0).std().loc[names]
+        for option, frames in results.items()
+    }
+    columns = {}
+    for option, frames in results.items():
+        reported = pd.concat(frames).groupby(level=0).mean()
+        reported = reported.loc[[f"{name}_se" for name in names]].set_axis(names)
+        ratio = reported / spread[option]
+        columns[(option, "var x")] = (spread["none"] ** 2 / spread[option] ** 2).median(
+            axis=1
+        )
+        columns[(option, "se/sd")] = ratio.median(axis=1)
+        columns[(option, "worst se/sd")] = ratio.min(axis=1)
+    return pd.DataFrame(columns)
+
+
+def main(argv: list[str] | None = None) -> pd.DataFrame:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.variance_reduction")
+    parser.add_argument("--seeds", type=int, default=30)
+    parser.add_argument("--simulations", type=int, default=1000)
+    parser.add_argument("--tickers", type=int, default=5)
+    parser.add_argument("--portfolios", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    price_df = synthetic_prices(args.tickers, 2520, rng)
+    weights = synthetic_weights(price_df.columns, args.portfolios, rng)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fit_cache.directory = Path(cache_dir, "fits")
+        result_cache.directory = Path(cache_dir, "results")
+        results = {
+            option: runs(price_df, weights, options, args.seeds, args.simulations)
+            for option, options in OPTIONS.items()
+        }
+    return summary(results)
+
+
+if __name__ == "__main__":
+    with pd.option_context("display.width", 200, "display.precision", 2):
+        print(main().to_string())
@@ -0,0 +1,191 @@
+import argparse
+import json
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from src.services.analysis import (
+    analyse_core_portfolios,
+    compare_strategies,
+    default_window,
+)
+from src.services.covariance import COVARIANCE_METHODS
+from src.services.monte_carlo import VARIANCE_REDUCTIONS
+
+CORE_PORTFOLIOS_RUN = "core-portfolios"
+
+
+def run(
+    name: str,
+    start_date: str | None,
+    end_date: str | None,
+    simulate: bool,
+    covariance: str = "sample",
+    variance_reduction: tuple[str, ...] = (),
+) -> dict[str, pd.DataFrame]:
+    """
+    Results of one run: a comma-separated ticker set or the core portfolios.
+    Missing dates default to the window the corresponding page uses, so the
+    results land under the same cache keys as the dashboard's.
+    """
+    if name == CORE_PORTFOLIOS_RUN:
+        default_start, default_end = default_window(years=10)
+        return analyse_core_portfolios(
+            start_date or default_start,
+            end_date or default_end,
+            simulate=simulate,
+            covariance=covariance,
+            variance_reduction=variance_reduction,
+        )
+    default_start, default_end = default_window(years=20)
+    tickers = [ticker.strip() for ticker in name.split(",") if ticker.strip()]
+    return compare_strategies(
+        tickers,
+        start_date or default_start,
+        end_date or default_end,
+        simulate,
+        covariance,
+        variance_reduction,
+    )
+
+
+def write_results(
+    directory: Path, results: dict[str, pd.DataFrame], format_: str
+) -> list[str]:
+    """Writes each frame of ``results`` under ``directory`` and returns the file names."""
+    directory.mkdir(parents=True, exist_ok=True)
+    if format_ == "parquet":
+        for name, frame in results.items():
+            frame.to_parquet(directory / f"{name}.parquet")
+        return [f"{name}.parquet" for name in results]
+
+    (directory / "results.json").write_text(
+        json.dumps(
+            {
+                name: json.loads(frame.to_json(orient="split", date_format="iso"))
+                for name, frame in results.items()
+            },
+            indent=2,
+        )
+    )
+    return ["results.json"]
+
+
+def _run_and_write(
+    name: str,
+    start_date: str | None,
+    end_date: str | None,
+    simulate: bool,
+    output: Path,
+    format_: str,
+    covariance: str,
+    variance_reduction: tuple[str, ...],
+) -> dict:
+    directory = output / name.replace(",", "_")
+    try:
+        results = run(
+            name, start_date, end_date, simulate, covariance, variance_reduction
+        )
+        files = write_results(directory, results, format_)
+    # Any failure is recorded in the manifest so the other runs still finish.
+    except Exception:  # noqa: BLE001
+        return {"run": name, "status": "failed", "error": traceback.format_exc()}
+    return {
+        "run": name,
+        "status": "ok",
+        "directory": str(directory),
+        "files": files,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description=(
+            "Runs the strategy comparison, crisis analysis and long-term "
+            "simulation without Streamlit. Results are also stored in the "
+            "shared result cache, so a dashboard using the same "
+            "RESULT_CACHE_DIR serves them without recomputing."
+        ),
+    )
+    parser.add_argument(
+        "ticker_sets",
+        nargs="*",
+        metavar="TICKERS",
+        help="comma-separated ticker set to compare strategies on, e.g. SPY,TLT,GLD",
+    )
+    parser.add_argument(
+        "--core-portfolios",
+        action="store_true",
+        help="also analyse the current core portfolios",
+    )
+    parser.add_argument(
+        "--start",
+        help="start date, by default 20 years ago (10 for the core portfolios)",
+    )
+    parser.add_argument("--end", help="end date, today by default")
+    parser.add_argument(
+        "--no-simulation",
+        dest="simulate",
+        action="store_false",
+        help="skip the long-term Monte Carlo simulation",
+    )
+    parser.add_argument(
+        "--covariance",
+        choices=COVARIANCE_METHODS,
+        default="sample",
+        help="covariance estimator of the optimizers and the simulation",
+    )
+    parser.add_argument(
+        "--variance-reduction",
+        nargs="+",
+        choices=VARIANCE_REDUCTIONS,
+        default=[],
+        help="variance reduction options of the simulation, which reports the "
+        "standard error of every statistic",
+    )
+    parser.add_argument("--output", type=Path, default=Path("results"))
+    parser.add_argument("--format", choices=["parquet", "json"], default="parquet")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="runs computed in parallel, each in its own process",
+    )
+    args = parser.parse_args(argv)
+
+    runs = list(args.ticker_sets)
+    if args.core_portfolios:
+        runs.append(CORE_PORTFOLIOS_RUN)
+    if not runs:
+        parser.error("give at least one ticker set or --core-portfolios")
+
+    run_args = (
+        args.start,
+        args.end,
+        args.simulate,
+        args.output,
+        args.format,
+        args.covariance,
+        tuple(args.variance_reduction),
+    )
+    if args.workers == 1 or len(runs) == 1:
+        manifest = [_run_and_write(name, *run_args) for name in runs]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(_run_and_write, name, *run_args) for name in runs]
+            manifest = [future.result() for future in futures]
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    (args.output / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    for entry in manifest:
+        print(f"{entry['run']}: {entry['status']}")
+        if entry["status"] == "failed":
+            print(entry["error"])
+    return int(any(entry["status"] == "failed" for entry in manifest))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
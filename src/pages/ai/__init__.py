@@ -8,6 +8,51 @@ from openai import OpenAI
 load_dotenv()
 
 
+def _system_messages(core_portfolios: dict, investment_strategies: dict) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": f"""
+            Here are some statistics of our core portfolios in json format. The names of the portfolios are equity100, core-growth, core-balanced, core-defensive.
+            The statistics are the following:
+            - Annualized Return
+            - Annualized Volatility
+            - Sharpe ratio
+            - Sortino ratio
+            - Calmar ratio
+            - Maximum Drawdown
+
+            ```json
+            {json.dumps(core_portfolios)}
+            ```
+            """.strip(),
+        },
+        {
+            "role": "system",
+            "content": f"""
+            Here are some statistics of some new strategeis that we are experimenting with.  
+            These strategies are based on the efficient frontier and risk parity.
+            The names of the strategies are max_sharpe, min_volatility, risk_parity, hierarchical_risk_parity.
+            The statistics are the following:
+            - Annualized Return
+            - Annualized Volatility
+            - Sharpe ratio
+            - Conditional Value at Risk (CVaR)
+            - 10 year shortfall risk (SR10Y)
+            - Probability of loss (PL)
+            
+            ```json
+            {json.dumps(investment_strategies)}
+            ```
+            """.strip(),
+        },
+        {
+            "role": "system",
+            "content": "You are a financial advisor with an expertise in portfolio management and asset allocation. You are very good at answering questions about finance and investment strategies.",
+        },
+    ]
+
+
 def ai_page():
     openai_ai_key_input = st.text_input(type="password", label="OpenAI API Key")
     openai_ai_key = os.getenv("OPENAI_API_KEY") or openai_ai_key_input
@@ -15,7 +60,13 @@ def ai_page():
         st.warning("Please enter your OpenAI API key.")
         return
 
-    if len(st.session_state["core_portfolios"]) == 0:
+    core_portfolios = st.session_state["core_portfolios"]
+    investment_strategies = st.session_state["current_investment_strategies"]
+    if len(core_portfolios) == 0 or len(investment_strategies) == 0:
+        st.info(
+            "Open the Comparing Investment Strategies and Core portfolios pages "
+            "first so the chatbot has their data."
+        )
         return
 
     openai_client = OpenAI(api_key=openai_ai_key)
@@ -24,56 +75,16 @@ def ai_page():
         "Clear chat history", on_click=lambda: st.session_state.pop("messages", None)
     )
 
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-
-    if len(st.session_state["messages"]) == 0:
-        st.session_state.messages = [
-            {
-                "role": "system",
-                "content": f"""
-                Here are some statistics of our core portfolios in json format. The names of the portfolios are equity100, core-growth, core-balanced, core-defensive.
-                The statistics are the following:
-                - Annualized Return
-                - Annualized Volatility
-                - Sharpe ratio
-                - Sortino ratio
-                - Calmar ratio
-                - Maximum Drawdown
-
-                ```json
-                {json.dumps(st.session_state["core_portfolios"])}
-                ```
-                """.strip(),
-            },
-            {
-                "role": "system",
-                "content": f"""
-                Here are some statistics of some new strategeis that we are experimenting with.  
-                These strategies are based on the efficient frontier and risk parity.
-                The names of the strategies are max_sharpe, min_volatility, risk_parity, hierarchical_risk_parity.
-                The statistics are the following:
-                - Annualized Return
-                - Annualized Volatility
-                - Sharpe ratio
-                - Conditional Value at Risk (CVaR)
-                - 10 year shortfall risk (SR10Y)
-                - Probability of loss (PL)
-                
-                ```json
-                {json.dumps(st.session_state["current_investment_strategies"])}
-                ```
-                """.strip(),
-            },
-            {
-                "role": "system",
-                "content": "You are a financial advisor with an expertise in portfolio management and asset allocation. You are very good at answering questions about finance and investment strategies.",
-            },
-        ]
+    # Only the conversation is kept: the data it is about is sent as it is
+    # now, so results computed after the chat started are not missed.
+    system_messages = _system_messages(core_portfolios, investment_strategies)
+    st.session_state.messages = [
+        message
+        for message in st.session_state.get("messages", [])
+        if message["role"] != "system"
+    ]
 
     for message in st.session_state.messages:
-        if message["role"] == "system":
-            continue
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
@@ -84,7 +95,7 @@ def ai_page():
         response = (
             openai_client.chat.completions.create(
                 model="gpt-4o",
-                messages=st.session_state["messages"],
+                messages=[*system_messages, *st.session_state["messages"]],
             )
             .choices[0]
             .message.content
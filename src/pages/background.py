@@ -0,0 +1,23 @@
+from collections.abc import Callable
+
+import streamlit as st
+
+from src.services.jobs import Job
+
+
+@st.fragment(run_every=1)
+def _poll(job: Job) -> None:
+    if job.done():
+        st.rerun()
+    st.progress(job.progress, text=job.message or "Running in the background...")
+
+
+def render_when_ready(job: Job, render: Callable) -> None:
+    """
+    Calls ``render`` with the job's result once it has finished. Until then,
+    shows its progress and polls it without blocking the rest of the page.
+    """
+    if job.done():
+        render(job.result())
+    else:
+        _poll(job)
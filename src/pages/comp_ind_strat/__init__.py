@@ -1,18 +1,22 @@
-import pandas as pd
 import streamlit as st
 
 from src.pages.comp_ind_strat.cumulative_returns import cumulative_returns
+from src.pages.comp_ind_strat.frontier import frontier_chart
 from src.pages.comp_ind_strat.long_term import long_term
 from src.pages.comp_ind_strat.market import market_page
-from src.services.data import get_data
-from src.services.strategy import calculate_performance_metrics, strategy
+from src.pages.comp_ind_strat.walk_forward import walk_forward
+from src.services.analysis import default_window
+from src.services.covariance import COVARIANCE_METHODS
+from src.services.data import get_data, get_returns, get_risk_free_rates
+from src.services.metrics import (
+    calculate_batch_performance_metrics,
+    weighted_portfolios,
+)
+from src.services.strategy import run_strategies
 
 
 def comparing_investment_strategies_page():
-    end_date = (pd.Timestamp.now()).strftime("%Y-%m-%d")
-    start_date = (pd.Timestamp.now() - pd.offsets.DateOffset(years=20)).strftime(
-        "%Y-%m-%d"
-    )
+    start_date, end_date = default_window(years=20)
 
     col1, col2 = st.columns(2)
 
@@ -28,18 +32,33 @@ def comparing_investment_strategies_page():
         help="Enter additional tickers separated by commas",
     )
 
+    covariance = st.selectbox(
+        "Covariance estimator",
+        COVARIANCE_METHODS,
+        help="Sample covariance, Ledoit-Wolf shrinkage, exponentially weighted, "
+        "or a low-rank factor model for wide universes",
+    )
+
     tickers = []
     if tickers_input:
         tickers = [ticker.strip() for ticker in tickers_input.split(",")]
 
     st.write("Selected tickers:", tickers)
-    strategy_tab, market_conditions_tab, long_term_tab = st.tabs(
-        [
-            "Cumulative Returns",
-            "Historical Crisis Events",
-            "Long-Term Portfolio",
-        ]
+    # Only the selected view runs, unlike tabs, which all compute every rerun.
+    views = [
+        "Cumulative Returns",
+        "Historical Crisis Events",
+        "Long-Term Portfolio",
+        "Walk-Forward Backtest",
+    ]
+    view = st.segmented_control(
+        "View",
+        views,
+        default=views[0],
+        key="comparing_view",
+        label_visibility="collapsed",
     )
+    view = view or views[0]
 
     price_df, risk_free_rate = get_data(
         tickers=tuple(tickers),
@@ -47,36 +66,27 @@ def comparing_investment_strategies_page():
         end_date=end_date,
     )
 
-    combined_weights = pd.concat(
-        [
-            # price_df.pct_change().dropna(),
-            strategy(price_df, "max_sharpe", risk_free_rate=risk_free_rate),
-            strategy(price_df, "min_volatility"),
-            strategy(price_df, "risk_parity"),
-            strategy(price_df, "hierarchical_risk_parity"),
-        ],
-        axis=1,
-    ).dropna()
+    combined_weights = run_strategies(
+        price_df, risk_free_rate=risk_free_rate, covariance=covariance
+    )
 
     st.session_state["current_investment_strategies"]["weights"] = (
         combined_weights.to_dict()
     )
 
-    with strategy_tab:
+    if view == "Cumulative Returns":
         with st.expander("Investment strategies weights"):
             st.dataframe(combined_weights)
-        combined_perf_metrics = {
-            strat: calculate_performance_metrics(
-                price_df, combined_weights[[strat]].T, risk_free_rate
-            )
-            for strat in combined_weights.columns
-        }
+        combined_perf_metrics = calculate_batch_performance_metrics(
+            price_df, combined_weights, get_risk_free_rates(price_df.index)
+        )
         with st.expander("Investment strategies performance metrics"):
-            st.write(pd.DataFrame(combined_perf_metrics))
-        cumulative_returns(price_df.pct_change() @ combined_weights)
-
-    with market_conditions_tab:
-        market_page(price_df @ combined_weights)
-
-    with long_term_tab:
-        long_term(price_df, combined_weights)
+            st.write(combined_perf_metrics)
+        cumulative_returns(weighted_portfolios(get_returns(price_df), combined_weights))
+        frontier_chart(price_df, combined_weights, risk_free_rate, covariance)
+    elif view == "Historical Crisis Events":
+        market_page(weighted_portfolios(price_df, combined_weights))
+    elif view == "Long-Term Portfolio":
+        long_term(price_df, combined_weights, covariance)
+    else:
+        walk_forward(price_df, get_risk_free_rates(price_df.index), covariance)
@@ -2,11 +2,14 @@ import pandas as pd
 import plotly.express as px
 import streamlit as st
 
+from src.services.tracing import span
+
 
 def cumulative_returns(portf_df: pd.DataFrame):
     cumulative_returns = (1 + portf_df).cumprod()
 
-    st.plotly_chart(px.line(cumulative_returns))
+    with span("render.plotly", chart="cumulative_returns"):
+        st.plotly_chart(px.line(cumulative_returns))
 
     with st.expander("Show data"):
         cumulative_returns[::-1]
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from src.services.covariance import CovarianceMethod
+from src.services.frontier import efficient_frontier
+from src.services.strategy import build_context
+from src.services.tracing import span
+
+
+def frontier_chart(
+    price_df: pd.DataFrame,
+    combined_weights: pd.DataFrame,
+    risk_free_rate: float,
+    covariance: CovarianceMethod = "sample",
+) -> None:
+    frontier = efficient_frontier(
+        price_df, risk_free_rate=risk_free_rate, covariance=covariance
+    )
+    context = build_context(price_df, covariance)
+
+    def performance(weights: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        values = weights.reindex(price_df.columns).fillna(0).to_numpy()
+        returns = context.mean_hist_ret.to_numpy() @ values
+        return returns, np.sqrt(context.covariance.variance(values))
+
+    figure = go.Figure()
+    figure.add_scatter(
+        x=frontier.volatilities,
+        y=frontier.returns,
+        mode="lines",
+        name="Efficient frontier",
+    )
+    special = pd.concat([frontier.min_variance, frontier.tangency], axis=1)
+    for weights, symbol in [(special, "star"), (combined_weights, "circle")]:
+        returns, volatilities = performance(weights)
+        figure.add_scatter(
+            x=volatilities,
+            y=returns,
+            mode="markers+text",
+            text=weights.columns,
+            textposition="top center",
+            marker={"symbol": symbol, "size": 10},
+            showlegend=False,
+        )
+    figure.update_layout(
+        xaxis_title="Annual volatility",
+        yaxis_title="Expected annual return",
+        xaxis_tickformat=".0%",
+        yaxis_tickformat=".0%",
+    )
+
+    with span("render.plotly", chart="efficient_frontier"):
+        st.plotly_chart(figure)
+
+    with st.expander("Frontier portfolios"):
+        st.dataframe(
+            pd.concat(
+                {
+                    "return": frontier.returns,
+                    "volatility": frontier.volatilities,
+                    "sharpe": frontier.sharpe_ratios,
+                },
+                axis=1,
+            ).join(frontier.weights.T)
+        )
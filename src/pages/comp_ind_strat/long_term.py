@@ -1,19 +1,45 @@
-import numpy as np
 import pandas as pd
 import streamlit as st
 
-from src.services.monte_carlo import get_simulated_prices, get_stats
+from src.pages.background import render_when_ready
+from src.services.covariance import CovarianceMethod
+from src.services.jobs import jobs
+from src.services.monte_carlo import VARIANCE_REDUCTIONS, simulate_stats
+from src.services.result_cache import canonical_key
 
 
-def long_term(price_df: pd.DataFrame, combined_weights: pd.DataFrame) -> None:
-    tickers = price_df.columns.tolist()
-    cube = np.array([get_simulated_prices(price_df[[ticker]]) for ticker in tickers])
-    stats = get_stats(cube, combined_weights)
+def long_term(
+    price_df: pd.DataFrame,
+    combined_weights: pd.DataFrame,
+    covariance: CovarianceMethod = "sample",
+) -> None:
     st.markdown(""" 
     # Long-Term Portfolio Simulation
     This section simulates the long-term performance of the portfolio using Monte Carlo methods.  
     Each ticker's hitorical price data is use to train a GARCH model, which is then used to generate simulated prices for the next 10 years.
     """)
+    variance_reduction = tuple(
+        st.multiselect(
+            "Variance reduction",
+            VARIANCE_REDUCTIONS,
+            help="Tighter statistics for the same number of paths; the *_se rows "
+            "show the standard error of each statistic.",
+        )
+    )
+    job = jobs.submit(
+        canonical_key(
+            "long_term", price_df, combined_weights, covariance, variance_reduction
+        ),
+        simulate_stats,
+        price_df,
+        combined_weights,
+        covariance=covariance,
+        variance_reduction=variance_reduction,
+    )
+    render_when_ready(job, show_stats)
+
+
+def show_stats(stats: pd.DataFrame) -> None:
     st.write(stats)
     st.session_state["current_investment_strategies"][
         "investment_strategies_long_term_simulation"
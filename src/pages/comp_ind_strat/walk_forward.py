@@ -0,0 +1,56 @@
+import pandas as pd
+import streamlit as st
+
+from src.pages.background import render_when_ready
+from src.pages.comp_ind_strat.cumulative_returns import cumulative_returns
+from src.services.backtest import BacktestResult, walk_forward_backtest
+from src.services.covariance import CovarianceMethod
+from src.services.jobs import jobs
+from src.services.result_cache import canonical_key
+
+rebalance_frequencies = {"Weekly": "W", "Monthly": "M", "Quarterly": "Q"}
+
+
+def walk_forward(
+    price_df: pd.DataFrame,
+    risk_free_rates: pd.Series,
+    covariance: CovarianceMethod = "sample",
+) -> None:
+    st.markdown("""
+    # Walk-Forward Backtest
+    Each strategy is re-optimized at every rebalance using only the returns before it, and held until the next rebalance.  
+    The metrics below are therefore out-of-sample, unlike the in-sample ones in the Cumulative Returns tab.
+    """)
+    col1, col2 = st.columns(2)
+    with col1:
+        rebalance = st.selectbox(
+            "Rebalance frequency", list(rebalance_frequencies), index=1
+        )
+    with col2:
+        window_years = st.number_input(
+            "Lookback window (years, 0 for expanding)", min_value=0, value=3
+        )
+
+    job = jobs.submit(
+        canonical_key(
+            "walk_forward",
+            price_df,
+            risk_free_rates,
+            rebalance,
+            window_years,
+            covariance,
+        ),
+        walk_forward_backtest,
+        price_df,
+        rebalance=rebalance_frequencies[rebalance],
+        window=252 * window_years or None,
+        risk_free_rate=risk_free_rates,
+        covariance=covariance,
+    )
+    render_when_ready(job, show_result)
+
+
+def show_result(result: BacktestResult) -> None:
+    with st.expander("Out-of-sample performance metrics"):
+        st.write(result.metrics)
+    cumulative_returns(result.returns)
@@ -0,0 +1,42 @@
+import pandas as pd
+import streamlit as st
+
+from src.services.jobs import jobs
+from src.services.tracing import Trace, profiler_available, totals
+
+
+def debug_enabled() -> bool:
+    """The debug panel is hidden unless the URL has ``?debug=1``."""
+    return st.query_params.get("debug") == "1"
+
+
+def profile_requested() -> bool:
+    """Whether this rerun was started by the panel's profile button."""
+    return bool(st.session_state.get("profile_rerun"))
+
+
+def debug_panel(rerun_trace: Trace, profile_report: dict) -> None:
+    with st.sidebar:
+        st.header("Debug")
+        st.markdown("**This rerun**")
+        if rerun_trace.spans:
+            st.dataframe(rerun_trace.spans_frame(), hide_index=True)
+        st.write(dict(rerun_trace.counters))
+
+        st.markdown("**Background jobs**")
+        for job in reversed(jobs.recent()):
+            status = "done" if job.done() else f"{job.progress:.0%}"
+            with st.expander(f"{job.key[:12]} ({status})"):
+                if job.trace.spans:
+                    st.dataframe(job.trace.spans_frame(), hide_index=True)
+                st.write(dict(job.trace.counters))
+
+        st.markdown("**Since the process started**")
+        st.dataframe(pd.Series(totals, name="count", dtype=int))
+
+        if profiler_available():
+            st.button("Profile a rerun", key="profile_rerun")
+        else:
+            st.caption("Install pyinstrument to profile a rerun.")
+        if "text" in profile_report:
+            st.code(profile_report["text"], language=None)
@@ -0,0 +1,136 @@
+from collections.abc import Iterable, Sequence
+
+import pandas as pd
+
+from src.services.covariance import CovarianceMethod
+from src.services.crisis import crisis_analytics
+from src.services.data import get_data, get_prices, get_risk_free_rates
+from src.services.metrics import (
+    calculate_batch_performance_metrics,
+    weighted_portfolios,
+)
+from src.services.monte_carlo import VarianceReduction, simulate_stats
+from src.services.scraper import scrape_core_portfolios
+from src.services.strategy import run_strategies
+
+# Core portfolio name to the key of its current allocation in the scraped data.
+CORE_PORTFOLIOS = {
+    "equity100": "15",
+    "core-growth": "25",
+    "core-balanced": "15",
+    "core-defensive": "5",
+}
+PROPER_TICKERS = {
+    "XDEW": "XDEW.L",
+    "CSPX": "CSPX.L",
+    "EIMI": "EIMI.L",
+    "IUAA": "IUAA.L",
+    "AGGU": "AGGU.L",
+}
+
+
+def default_window(years: int) -> tuple[str, str]:
+    """``(start_date, end_date)`` of the last ``years`` years up to today."""
+    now = pd.Timestamp.now()
+    start = now - pd.offsets.DateOffset(years=years)
+    return start.strftime("%Y-%m-%d"), now.strftime("%Y-%m-%d")
+
+
+def compare_strategies(
+    tickers: Iterable[str],
+    start_date: str,
+    end_date: str,
+    simulate: bool = True,
+    covariance: CovarianceMethod = "sample",
+    variance_reduction: Sequence[VarianceReduction] = (),
+) -> dict[str, pd.DataFrame]:
+    """
+    Everything the strategy comparison page shows for ``tickers``: the weights
+    of every strategy, their performance metrics, their return, CAGR, drawdown
+    and recovery during each crisis and, if ``simulate``, their long-term simulation statistics.
+    ``covariance`` selects the estimator the optimizers and the simulation use,
+    ``variance_reduction`` the simulation's variance reduction options.
+    """
+    price_df, risk_free_rate = get_data(tuple(tickers), start_date, end_date)
+    weights = run_strategies(
+        price_df, risk_free_rate=risk_free_rate, covariance=covariance
+    )
+    results = {
+        "weights": weights,
+        "metrics": calculate_batch_performance_metrics(
+            price_df, weights, get_risk_free_rates(price_df.index)
+        ),
+        "crisis": crisis_analytics(weighted_portfolios(price_df, weights)),
+    }
+    if simulate:
+        results["long_term"] = simulate_stats(
+            price_df,
+            weights,
+            covariance=covariance,
+            variance_reduction=tuple(variance_reduction),
+        )
+    return results
+
+
+def get_core_portfolio_weights() -> dict[str, pd.DataFrame]:
+    """Current ETF weights of each core portfolio, one row per portfolio."""
+    portfolio_infos = scrape_core_portfolios(CORE_PORTFOLIOS)
+    portfolio_weights = {}
+    for portfolio, second_key in CORE_PORTFOLIOS.items():
+        etf_allocation = portfolio_infos[portfolio]["etfAllocation"][second_key]
+        portfolio_weights[portfolio] = pd.DataFrame([etf_allocation]).rename(
+            columns=PROPER_TICKERS
+        )
+    return portfolio_weights
+
+
+def core_portfolio_inputs(
+    portfolio_weights: dict[str, pd.DataFrame], start_date: str, end_date: str
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Returns the performance metrics of each core portfolio over the days all
+    its ETFs are listed, and the aligned prices of every ETF with the weights
+    of shape ``(tickers, portfolios)``, for the long-term simulation.
+    """
+    all_tickers = tuple(
+        ticker for weights in portfolio_weights.values() for ticker in weights.columns
+    )
+    all_price_df = get_prices(all_tickers, start_date, end_date)
+    risk_free_rates = get_risk_free_rates(all_price_df.index)
+
+    combined_weights = (
+        pd.DataFrame(
+            {
+                portfolio: weights.iloc[0]
+                for portfolio, weights in portfolio_weights.items()
+            }
+        )
+        .reindex(all_price_df.columns)
+        .fillna(0)
+    )
+    metrics = calculate_batch_performance_metrics(
+        all_price_df, combined_weights, risk_free_rates
+    )
+    return metrics, all_price_df, combined_weights
+
+
+def analyse_core_portfolios(
+    start_date: str,
+    end_date: str,
+    simulate: bool = True,
+    covariance: CovarianceMethod = "sample",
+    variance_reduction: Sequence[VarianceReduction] = (),
+) -> dict[str, pd.DataFrame]:
+    """The core portfolios' weights, metrics and long-term simulation statistics."""
+    metrics, price_df, weights = core_portfolio_inputs(
+        get_core_portfolio_weights(), start_date, end_date
+    )
+    results = {"weights": weights, "metrics": metrics}
+    if simulate:
+        results["long_term"] = simulate_stats(
+            price_df,
+            weights,
+            covariance=covariance,
+            variance_reduction=tuple(variance_reduction),
+        )
+    return results
@@ -0,0 +1,283 @@
+import multiprocessing
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import pairwise
+
+import numpy as np
+import pandas as pd
+from pypfopt.exceptions import OptimizationError
+
+from src.services.covariance import Covariance, CovarianceMethod, compute_covariance
+from src.services.data import get_returns
+from src.services.result_cache import cached
+from src.services.strategy import (
+    STRATEGIES,
+    StrategyContext,
+    StrategyType,
+    calculate_performance_metrics,
+    strategy,
+)
+from src.services.tracing import traced
+
+
+class RollingMoments:
+    """
+    Mean and covariance of a window of return rows, updated in place as rows
+    enter and leave instead of being recomputed per window.
+
+    Sums are kept around a fixed shift (the first rows' mean), which keeps the
+    ``sum(x x') - n m m'`` form from cancelling catastrophically.
+    """
+
+    def __init__(self, n_assets: int):
+        self.count = 0
+        self.shift: np.ndarray | None = None
+        self.sum = np.zeros(n_assets)
+        self.cross = np.zeros((n_assets, n_assets))
+
+    def _shifted(self, rows: np.ndarray) -> np.ndarray:
+        if self.shift is None:
+            self.shift = rows.mean(axis=0)
+        return rows - self.shift
+
+    def add(self, rows: np.ndarray) -> None:
+        """Rank-``len(rows)`` update with the rows entering the window."""
+        shifted = self._shifted(rows)
+        self.count += len(rows)
+        self.sum += shifted.sum(axis=0)
+        self.cross += shifted.T @ shifted
+
+    def remove(self, rows: np.ndarray) -> None:
+        """Rank-``len(rows)`` downdate with the rows leaving the window."""
+        shifted = self._shifted(rows)
+        self.count -= len(rows)
+        self.sum -= shifted.sum(axis=0)
+        self.cross -= shifted.T @ shifted
+
+    def mean(self) -> np.ndarray:
+        return self.shift + self.sum / self.count
+
+    def cov(self) -> np.ndarray:
+        centered_sum = np.outer(self.sum, self.sum) / self.count
+        return (self.cross - centered_sum) / (self.count - 1)
+
+
+@dataclass(frozen=True)
+class BacktestResult:
+    """Walk-forward weights per strategy and their out-of-sample performance."""
+
+    weights: dict[str, pd.DataFrame]
+    returns: pd.DataFrame
+    metrics: pd.DataFrame
+
+
+def rebalance_positions(
+    index: pd.DatetimeIndex, rebalance: str, min_history: int
+) -> np.ndarray:
+    """Positions in ``index`` of the first trading day of each ``rebalance`` period."""
+    periods = index.to_period(rebalance)
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    return starts[starts >= min_history]
+
+
+def _window_contexts(
+    daily_returns: pd.DataFrame,
+    positions: np.ndarray,
+    window: int | None,
+    covariance: CovarianceMethod = "sample",
+) -> list[StrategyContext]:
+    """
+    Contexts fitted on the returns strictly before each position, over the
+    last ``window`` rows or all of them when ``window`` is None.
+
+    The sample covariance of gap-free returns is updated window to window by
+    ``RollingMoments``; other estimators, and returns with gaps, are fitted
+    on each window like ``build_context`` does.
+    """
+    values = daily_returns.to_numpy()
+    rolling = covariance == "sample" and not np.isnan(values).any()
+    moments = RollingMoments(values.shape[1])
+    contexts = []
+    start, end = 0, 0
+    for position in positions:
+        if rolling:
+            moments.add(values[end:position])
+        end = position
+        if window is not None and end - start > window:
+            if rolling:
+                moments.remove(values[start : end - window])
+            start = end - window
+
+        window_returns = daily_returns.iloc[start:end]
+        if rolling:
+            mean_hist_ret = pd.Series(moments.mean() * 252, index=daily_returns.columns)
+            estimate = Covariance.from_matrix(
+                moments.cov() * 252, daily_returns.columns
+            )
+        else:
+            mean_hist_ret = window_returns.mean() * 252
+            estimate = compute_covariance(window_returns, covariance)
+        contexts.append(
+            StrategyContext(
+                daily_returns=window_returns,
+                mean_hist_ret=mean_hist_ret,
+                covariance=estimate,
+            )
+        )
+    return contexts
+
+
+def _rates_at(risk_free_rate: float | pd.Series, dates: pd.DatetimeIndex) -> np.ndarray:
+    """
+    The annualized rate known on each of ``dates``: the last one at or
+    before it, or 0 before the first. A constant rate is used as is.
+    """
+    if not isinstance(risk_free_rate, pd.Series):
+        return np.full(len(dates), float(risk_free_rate))
+    known = risk_free_rate.dropna().sort_index()
+    return known.asof(dates).fillna(0.0).to_numpy()
+
+
+def _walk_forward_weights(
+    price_df: pd.DataFrame,
+    contexts: list[StrategyContext],
+    risk_free_rates: np.ndarray,
+    type_: StrategyType,
+) -> np.ndarray:
+    """
+    Weights of shape ``(rebalances, tickers)``, each window optimized against
+    its own entry of ``risk_free_rates``. A window the optimizer cannot solve
+    (e.g. max_sharpe with no asset above the risk-free rate) keeps the
+    previous weights, or equal weights before the first successful fit.
+    """
+    n_assets = price_df.shape[1]
+    weights = np.empty((len(contexts), n_assets))
+    previous = np.full(n_assets, 1 / n_assets)
+    for i, (context, risk_free_rate) in enumerate(
+        zip(contexts, risk_free_rates, strict=True)
+    ):
+        try:
+            fitted = strategy(price_df, type_, risk_free_rate, context=context)
+            previous = fitted[type_].reindex(price_df.columns).fillna(0).to_numpy()
+        except (ValueError, OptimizationError):
+            pass
+        weights[i] = previous
+    return weights
+
+
+def _out_of_sample_returns(
+    daily_returns: np.ndarray, positions: np.ndarray, weights: np.ndarray
+) -> np.ndarray:
+    """
+    Daily portfolio returns from each rebalance to the next, letting the
+    weights drift with prices in between.
+    """
+    boundaries = np.r_[positions, len(daily_returns)]
+    returns = np.empty(boundaries[-1] - boundaries[0])
+    for i, (start, end) in enumerate(pairwise(boundaries)):
+        values = np.cumprod(1 + daily_returns[start:end], axis=0) @ weights[i]
+        offset = start - boundaries[0]
+        returns[offset] = values[0] - 1
+        returns[offset + 1 : offset + end - start] = values[1:] / values[:-1] - 1
+    return returns
+
+
+@cached()
+@traced()
+def walk_forward_backtest(
+    price_df: pd.DataFrame,
+    types: Sequence[StrategyType] = STRATEGIES,
+    rebalance: str = "M",
+    window: int | None = 252 * 3,
+    min_history: int = 252,
+    risk_free_rate: float | pd.Series = 0.02,
+    max_workers: int = 1,
+    covariance: CovarianceMethod = "sample",
+) -> BacktestResult:
+    """
+    Parameters
+    ----------
+    price_df : pd.DataFrame
+        Prices of shape ``(days, tickers)``.
+    types : Sequence[StrategyType]
+        Strategies to backtest.
+    rebalance : str
+        Pandas period frequency at which weights are re-optimized, e.g. "W",
+        "M" or "Q".
+    window : int, optional
+        Number of trailing daily returns each fit sees; None for an expanding
+        window.
+    min_history : int
+        Daily returns required before the first rebalance.
+    risk_free_rate : float | pd.Series
+        Annualized risk-free rate, constant or by date. Each rebalance
+        optimizes against the rate known on its last day of history, the
+        performance metrics use it as given.
+    max_workers : int
+        Size of a process pool to spread the strategies over; 1, the default,
+        runs them in this process. The pool's workers are spawned, not forked,
+        as the walk may be started from a Streamlit or job runner thread.
+    covariance : CovarianceMethod
+        Covariance estimator of every window, as in ``run_strategies``.
+    """
+    # Rebalancing needs every ticker, so the walk starts once all are listed.
+    # Later gaps stay NaN for the estimators; held positions keep their last
+    # close over a gap and take its whole move on the day trading resumes.
+    listed = price_df.notna().all(axis=1)
+    if not listed.any():
+        raise ValueError("No day with a close for every ticker")
+    price_df = price_df.loc[listed.idxmax() :]
+    daily_returns = get_returns(price_df)
+    held_returns = get_returns(price_df.ffill()).to_numpy()
+    positions = rebalance_positions(
+        daily_returns.index, rebalance, min_history=max(min_history, 2)
+    )
+    if len(positions) == 0:
+        raise ValueError("Not enough history for a single rebalance")
+
+    contexts = _window_contexts(daily_returns, positions, window, covariance)
+    optimizer_rates = _rates_at(risk_free_rate, daily_returns.index[positions - 1])
+    run = partial(_walk_forward_weights, price_df, contexts, optimizer_rates)
+    if len(types) == 1 or max_workers <= 1:
+        weights = [run(type_) for type_ in types]
+    else:
+        with ProcessPoolExecutor(
+            max_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            weights = list(pool.map(run, types))
+
+    rebalance_dates = daily_returns.index[positions]
+    returns = pd.DataFrame(
+        {
+            type_: _out_of_sample_returns(held_returns, positions, strategy_weights)
+            for type_, strategy_weights in zip(types, weights)
+        },
+        index=daily_returns.index[positions[0] :],
+    )
+    # calculate_performance_metrics works on a value series, starting at 1
+    # on the day before the first out-of-sample return.
+    start = pd.DataFrame(
+        1.0, index=daily_returns.index[[positions[0] - 1]], columns=returns.columns
+    )
+    values = pd.concat([start, (1 + returns).cumprod()])
+    metrics = pd.DataFrame(
+        {
+            type_: calculate_performance_metrics(
+                values[[type_]], pd.DataFrame([[1.0]]), risk_free_rate
+            )
+            for type_ in types
+        }
+    )
+
+    return BacktestResult(
+        weights={
+            type_: pd.DataFrame(
+                strategy_weights, index=rebalance_dates, columns=price_df.columns
+            )
+            for type_, strategy_weights in zip(types, weights)
+        },
+        returns=returns,
+        metrics=metrics,
+    )
@@ -0,0 +1,268 @@
+from dataclasses import dataclass
+from typing import Literal, get_args
+
+import numpy as np
+import pandas as pd
+
+from src.services.result_cache import cached
+from src.services.tracing import traced
+
+CovarianceMethod = Literal["sample", "ledoit_wolf", "ewma", "factor"]
+COVARIANCE_METHODS: tuple[CovarianceMethod, ...] = get_args(CovarianceMethod)
+
+# Singular values below this fraction of the largest carry no variance.
+_RANK_TOLERANCE = 1e-12
+
+
+@dataclass(frozen=True)
+class Covariance:
+    """
+    Annualized covariance in low-rank-plus-diagonal form,
+    ``loadings @ loadings.T + diag(specific)``.
+
+    ``loadings`` has shape ``(tickers, k)``. The full-rank estimators keep
+    ``k = min(tickers, days - 1)`` columns, the factor model only its factors,
+    so storing it and every product below cost ``O(tickers * k)``. Only
+    ``to_frame`` builds the dense ``(tickers, tickers)`` matrix.
+    """
+
+    tickers: pd.Index
+    loadings: np.ndarray
+    specific: np.ndarray
+
+    @classmethod
+    def from_matrix(
+        cls, matrix: pd.DataFrame | np.ndarray, tickers: pd.Index | None = None
+    ) -> "Covariance":
+        if tickers is None:
+            tickers = matrix.index if isinstance(matrix, pd.DataFrame) else None
+        matrix = np.asarray(matrix, dtype=float)
+        try:
+            loadings = np.linalg.cholesky(matrix)
+        except np.linalg.LinAlgError:
+            eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+            keep = eigenvalues > _RANK_TOLERANCE * eigenvalues.max(initial=0)
+            loadings = eigenvectors[:, keep] * np.sqrt(eigenvalues[keep])
+        return cls(
+            pd.Index(range(len(matrix)) if tickers is None else tickers),
+            loadings,
+            np.zeros(len(matrix)),
+        )
+
+    @property
+    def n_factors(self) -> int:
+        return self.loadings.shape[1]
+
+    def diagonal(self) -> np.ndarray:
+        return np.einsum("ik,ik->i", self.loadings, self.loadings) + self.specific
+
+    def to_frame(self) -> pd.DataFrame:
+        matrix = self.loadings @ self.loadings.T
+        matrix[np.diag_indices_from(matrix)] += self.specific
+        return pd.DataFrame(matrix, index=self.tickers, columns=self.tickers)
+
+    def dot(self, x: np.ndarray) -> np.ndarray:
+        """The covariance times ``x`` of shape ``(tickers,)`` or ``(tickers, n)``."""
+        return self.loadings @ (self.loadings.T @ x) + (self.specific * x.T).T
+
+    def variance(self, weights: np.ndarray) -> np.ndarray:
+        """Variance of each column of ``weights``, shape ``(tickers, portfolios)``."""
+        exposures = self.loadings.T @ weights
+        return np.einsum("k...,k...->...", exposures, exposures) + np.einsum(
+            "i,i...->...", self.specific, weights**2
+        )
+
+    def solve(self, rhs: np.ndarray, shift: np.ndarray) -> np.ndarray:
+        """
+        Solves ``(covariance + diag(shift)) x = rhs`` with the Woodbury identity,
+        in ``O(tickers * k**2)``. ``specific + shift`` must be positive.
+        """
+        inverse_diagonal = 1 / (self.specific + shift)
+        scaled = self.loadings * inverse_diagonal[:, None]
+        capacitance = np.eye(self.n_factors) + self.loadings.T @ scaled
+        x = (inverse_diagonal * rhs.T).T
+        return x - scaled @ np.linalg.solve(capacitance, self.loadings.T @ x)
+
+    def correlation(self) -> "Covariance":
+        """The same form rescaled to a unit diagonal."""
+        scale = 1 / np.sqrt(self.diagonal())
+        return Covariance(
+            self.tickers, self.loadings * scale[:, None], self.specific * scale**2
+        )
+
+
+def _components(centered: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Right singular vectors and singular values of ``centered`` (days,
+    tickers), null directions dropped, so ``centered.T @ centered`` is
+    ``(vectors * values) @ (vectors * values).T`` without being formed.
+    """
+    _, values, vectors_t = np.linalg.svd(centered, full_matrices=False)
+    keep = values > _RANK_TOLERANCE * values.max(initial=0)
+    return vectors_t[keep].T, values[keep]
+
+
+def _masked_centered(
+    values: np.ndarray, day_weights: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    ``values`` centered on each column's weighted mean over its present days,
+    with missing entries as zero so they drop out of every product, and the
+    mask of present entries.
+    """
+    present = ~np.isnan(values)
+    weights = day_weights[:, None] * present
+    means = np.sum(weights * np.where(present, values, 0), axis=0) / weights.sum(axis=0)
+    return np.where(present, values - means, 0), present
+
+
+def _pairwise(values: np.ndarray, day_weights: np.ndarray, ddof: int) -> np.ndarray:
+    """
+    Covariance of every pair of columns over the days both are present, each
+    pair normalized by its own overlap: the per-pair overlap window estimate
+    for tickers listed on different dates. It need not be positive
+    semi-definite; ``Covariance.from_matrix`` projects it.
+    """
+    centered, present = _masked_centered(values, day_weights)
+    products = (day_weights[:, None] * centered).T @ centered
+    overlap = (day_weights[:, None] * present).T @ present
+    return products / (overlap - ddof)
+
+
+def _leading(matrix: np.ndarray, n_factors: int) -> tuple[np.ndarray, np.ndarray]:
+    """Loadings of the ``n_factors`` leading eigenpairs of ``matrix`` and the residual diagonal."""
+    eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+    order = np.argsort(eigenvalues)[::-1][:n_factors]
+    order = order[eigenvalues[order] > 0]
+    loadings = eigenvectors[:, order] * np.sqrt(eigenvalues[order])
+    return loadings, np.clip(np.diag(matrix) - np.sum(loadings**2, axis=1), 0, None)
+
+
+def sample_covariance(daily_returns: pd.DataFrame) -> Covariance:
+    """
+    Sample covariance; with missing returns, over each pair's overlap
+    (``O(tickers**2)``, projected to the nearest valid covariance).
+    """
+    values = daily_returns.to_numpy(dtype=float)
+    if np.isnan(values).any():
+        pairwise = _pairwise(values, np.ones(len(values)), ddof=1)
+        return Covariance.from_matrix(pairwise * 252, daily_returns.columns)
+    vectors, singular = _components(values - values.mean(axis=0))
+    loadings = vectors * singular * np.sqrt(252 / (len(values) - 1))
+    return Covariance(daily_returns.columns, loadings, np.zeros(values.shape[1]))
+
+
+def ledoit_wolf_covariance(daily_returns: pd.DataFrame) -> Covariance:
+    """
+    Sample covariance shrunk towards a scaled identity by the intensity of
+    Ledoit and Wolf (2004), the same as ``sklearn.covariance.LedoitWolf``.
+    The intensity is computed from the ``(days, days)`` Gram matrix when it
+    is the smaller one, so no ``(tickers, tickers)`` matrix is formed.
+
+    With missing returns, the intensity comes from the masked returns and
+    shrinks the per-pair overlap covariance.
+    """
+    values = daily_returns.to_numpy(dtype=float)
+    n_days, n_tickers = values.shape
+    centered, present = _masked_centered(values, np.ones(n_days))
+    squared = centered**2
+
+    variances = squared.sum(axis=0) / n_days
+    mu = variances.sum() / n_tickers
+    gram = centered @ centered.T if n_days < n_tickers else centered.T @ centered
+    delta = (
+        np.sum(gram**2) / n_days**2 - 2 * mu * variances.sum() + n_tickers * mu**2
+    ) / n_tickers
+    beta = (np.sum(squared.sum(axis=1) ** 2) / n_days - np.sum(gram**2) / n_days**2) / (
+        n_tickers * n_days
+    )
+    shrinkage = 0.0 if delta == 0 else min(beta, delta) / delta
+
+    if not present.all():
+        pairwise = _pairwise(values, np.ones(n_days), ddof=0) * 252
+        target = np.trace(pairwise) / n_tickers
+        shrunk = Covariance.from_matrix((1 - shrinkage) * pairwise)
+        return Covariance(
+            daily_returns.columns,
+            shrunk.loadings,
+            np.full(n_tickers, shrinkage * target),
+        )
+    vectors, singular = _components(centered)
+    loadings = vectors * singular * np.sqrt((1 - shrinkage) * 252 / n_days)
+    return Covariance(
+        daily_returns.columns, loadings, np.full(n_tickers, shrinkage * mu * 252)
+    )
+
+
+def ewma_covariance(daily_returns: pd.DataFrame, span: int = 180) -> Covariance:
+    """
+    Exponentially weighted covariance, the weight of a day decaying by
+    ``1 - 2 / (span + 1)``; with missing returns, each pair is normalized by
+    the weight of the days both are present.
+    """
+    values = daily_returns.to_numpy(dtype=float)
+    decay = 1 - 2 / (span + 1)
+    weights = decay ** np.arange(len(values) - 1, -1, -1)
+    weights /= weights.sum()
+    if np.isnan(values).any():
+        pairwise = _pairwise(values, weights, ddof=0)
+        return Covariance.from_matrix(pairwise * 252, daily_returns.columns)
+    centered = values - weights @ values
+    vectors, singular = _components(centered * np.sqrt(weights)[:, None])
+    loadings = vectors * singular * np.sqrt(252)
+    return Covariance(daily_returns.columns, loadings, np.zeros(values.shape[1]))
+
+
+def factor_covariance(daily_returns: pd.DataFrame, n_factors: int = 5) -> Covariance:
+    """
+    Statistical factor model: the ``n_factors`` leading principal components
+    of the sample covariance, plus each ticker's remaining variance as its
+    specific variance, so the diagonal matches the sample covariance.
+    """
+    values = daily_returns.to_numpy(dtype=float)
+    if np.isnan(values).any():
+        pairwise = _pairwise(values, np.ones(len(values)), ddof=1) * 252
+        return Covariance(daily_returns.columns, *_leading(pairwise, n_factors))
+    sample = sample_covariance(daily_returns)
+    loadings = sample.loadings[:, :n_factors]
+    specific = np.clip(sample.diagonal() - np.sum(loadings**2, axis=1), 0, None)
+    return Covariance(daily_returns.columns, loadings, specific)
+
+
+def compute_covariance(
+    daily_returns: pd.DataFrame,
+    method: CovarianceMethod = "sample",
+    span: int = 180,
+    n_factors: int = 5,
+) -> Covariance:
+    """
+    Annualized covariance of ``daily_returns`` by ``method``; ``span`` applies
+    to ``ewma`` and ``n_factors`` to ``factor``. Uncached, for estimates made
+    once each such as those of every backtest window.
+    """
+    match method:
+        case "sample":
+            return sample_covariance(daily_returns)
+        case "ledoit_wolf":
+            return ledoit_wolf_covariance(daily_returns)
+        case "ewma":
+            return ewma_covariance(daily_returns, span)
+        case "factor":
+            return factor_covariance(daily_returns, n_factors)
+        case _:
+            raise ValueError(f"Unknown covariance method: {method}")
+
+
+@cached(persist=False)
+@traced()
+def estimate_covariance(
+    daily_returns: pd.DataFrame,
+    method: CovarianceMethod = "sample",
+    span: int = 180,
+    n_factors: int = 5,
+) -> Covariance:
+    """
+    ``compute_covariance``, cached, so every consumer of the same returns
+    shares one estimate.
+    """
+    return compute_covariance(daily_returns, method, span, n_factors)
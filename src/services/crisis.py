@@ -0,0 +1,186 @@
+import os
+from functools import cache
+
+import numpy as np
+import pandas as pd
+
+from src.services.result_cache import cached
+from src.services.tracing import traced
+
+CRISIS_EVENTS = [
+    ("2022 Inflation", "2021-12-31", "2022-09-30"),
+    ("COVID-19 Pandemic", "2019-12-31", "2020-03-31"),
+    ("Chinese Stock Market Crash", "2015-06-01", "2015-09-30"),
+    ("Flash Crash 2010", "2010-03-31", "2010-06-30"),
+    ("2008 Financial Crisis", "2007-10-01", "2009-03-31"),
+    # ("Dot-com Bubble Burst", "1999-12-31", "2003-03-31"),
+]
+"""Built-in ``(stress_event, start_date, end_date)`` catalogue."""
+
+METRICS = ["return", "cagr", "max_drawdown", "recovery_days"]
+# Bounds the (events, strategies, days) temporaries of the recovery search.
+_RECOVERY_BLOCK_SIZE = 2**22
+
+
+def _events_frame(rows) -> pd.DataFrame:
+    events = pd.DataFrame(rows, columns=["stress_event", "start_date", "end_date"])
+    events["start_date"] = pd.to_datetime(events["start_date"])
+    events["end_date"] = pd.to_datetime(events["end_date"])
+    return events
+
+
+@cache
+def _catalogue(path: str | None) -> pd.DataFrame:
+    events = _events_frame(CRISIS_EVENTS)
+    if path:
+        extra = pd.read_csv(path, usecols=["stress_event", "start_date", "end_date"])
+        events = pd.concat([events, _events_frame(extra)], ignore_index=True)
+    return events.drop_duplicates("stress_event", keep="last", ignore_index=True)
+
+
+def load_crisis_events() -> pd.DataFrame:
+    """
+    The built-in events plus those of the CSV file (``stress_event``,
+    ``start_date``, ``end_date``) named by ``CRISIS_EVENTS_FILE``, if set.
+    The catalogue is read once per process.
+    """
+    return _catalogue(os.getenv("CRISIS_EVENTS_FILE")).copy()
+
+
+def snap_events(index: pd.DatetimeIndex, events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Positions in ``index`` of each event's start and end, snapped to the last
+    trading day on or before each date. Events not inside ``index``, or that
+    span no trading day, are dropped.
+    """
+    start = index.searchsorted(events["start_date"].to_numpy(), side="right") - 1
+    end = index.searchsorted(events["end_date"].to_numpy(), side="right") - 1
+    inside = (start >= 0) & (events["end_date"].to_numpy() <= index[-1]) & (end > start)
+    snapped = events[inside].assign(start=start[inside], end=end[inside])
+    return snapped.set_index("stress_event")
+
+
+def detect_drawdowns(series: pd.Series, threshold: float = 0.1) -> pd.DataFrame:
+    """
+    Peak-to-trough drawdowns of ``series`` deeper than ``threshold``, as an
+    event catalogue usable with ``crisis_analytics``.
+    """
+    values = series.to_numpy(dtype=float)
+    peaks = np.fmax.accumulate(values)
+    drawdown = values / peaks - 1
+    # Every new high starts an episode that lasts until the next one.
+    episode = np.cumsum(values >= peaks)
+    frame = pd.DataFrame(
+        {"episode": episode, "drawdown": drawdown, "date": series.index}
+    )
+    troughs = frame.loc[frame.groupby("episode")["drawdown"].idxmin()]
+    troughs = troughs[troughs["drawdown"] <= -threshold]
+    starts = frame.groupby("episode")["date"].first().loc[troughs["episode"]]
+    return pd.DataFrame(
+        {
+            "stress_event": [
+                f"Drawdown {start:%Y-%m-%d} ({drawdown:.0%})"
+                for start, drawdown in zip(starts, troughs["drawdown"], strict=True)
+            ],
+            "start_date": starts.to_numpy(),
+            "end_date": troughs["date"].to_numpy(),
+        }
+    )
+
+
+def _recovery_days(
+    values: np.ndarray, trough: np.ndarray, level: np.ndarray
+) -> np.ndarray:
+    """
+    Trading days from ``trough`` (shape ``(events, strategies)``) until
+    ``values`` first gets back to ``level``, NaN if it never does.
+    """
+    n_days, n_strategies = values.shape
+    columns = np.arange(n_strategies)
+    result = np.full(trough.shape, np.nan)
+    block = max(1, _RECOVERY_BLOCK_SIZE // (n_days * n_strategies))
+    for start in range(0, len(trough), block):
+        rows = slice(start, start + block)
+        days = trough[rows, :, None] + np.arange(n_days)
+        ahead = days < n_days
+        path = values[np.minimum(days, n_days - 1), columns[None, :, None]]
+        recovered = ahead & (path >= level[rows, :, None])
+        result[rows] = np.where(recovered.any(axis=2), recovered.argmax(axis=2), np.nan)
+    return result
+
+
+def crisis_analytics(
+    price_df: pd.DataFrame, events: pd.DataFrame | None = None
+) -> pd.DataFrame:
+    """
+    Parameters
+    ----------
+    price_df : pd.DataFrame
+        Values of shape ``(days, strategies)``.
+    events : pd.DataFrame, optional
+        Catalogue with ``stress_event``, ``start_date`` and ``end_date``
+        columns, ``load_crisis_events()`` by default.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per event covered by ``price_df``, with the snapped
+        ``start_date`` and ``end_date`` and, for every strategy, the
+        ``return`` and ``cagr`` from start to end, the ``max_drawdown`` within
+        the event, and the ``recovery_days`` from its trough until the value
+        at the start of the event is regained (NaN if not yet). Metric
+        columns are ``(metric, strategy)``.
+    """
+    # Resolved before the cache, so the default and the catalogue passed
+    # explicitly share one entry.
+    return _crisis_analytics(
+        price_df, load_crisis_events() if events is None else events
+    )
+
+
+@cached()
+@traced("crisis.crisis_analytics")
+def _crisis_analytics(price_df: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    events = snap_events(price_df.index, events)
+    values = price_df.to_numpy(dtype=float)
+    start, end = events["start"].to_numpy(), events["end"].to_numpy()
+    start_values, end_values = values[start], values[end]
+
+    total_return = end_values / start_values - 1
+    years = (price_df.index[end] - price_df.index[start]).days.to_numpy() / 365.25
+    cagr = (end_values / start_values) ** (1 / years[:, None]) - 1
+
+    # Every event's window gathered at once, padded past its end with its
+    # last day so the padding never changes the running peak or the minimum.
+    length = int((end - start).max(initial=0)) + 1
+    days = np.minimum(start[:, None] + np.arange(length), end[:, None])
+    window = values[days]
+    peaks = np.maximum.accumulate(window, axis=1)
+    max_drawdown = (window / peaks - 1).min(axis=1)
+    trough = start[:, None] + window.argmin(axis=1)
+    recovery_days = _recovery_days(values, trough, start_values)
+
+    metrics = pd.concat(
+        {
+            name: pd.DataFrame(metric, index=events.index, columns=price_df.columns)
+            for name, metric in zip(
+                METRICS,
+                [total_return, cagr, max_drawdown, recovery_days],
+                strict=True,
+            )
+        },
+        axis=1,
+    )
+    dates = pd.DataFrame(
+        {
+            ("start_date", ""): price_df.index[start],
+            ("end_date", ""): price_df.index[end],
+        },
+        index=events.index,
+    )
+    return pd.concat([dates, metrics], axis=1)
+
+
+def get_crisis_cagr(price_df: pd.DataFrame) -> pd.DataFrame:
+    """CAGR of each strategy during each catalogued crisis."""
+    return crisis_analytics(price_df)["cagr"]
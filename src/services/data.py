@@ -1,19 +1,112 @@
-import pandas as pd
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 
+import numpy as np
+import pandas as pd
+
+from src.services.price_cache import price_cache
+from src.services.result_cache import cached
+from src.services.tracing import map_in_context, traced
+
+_RISK_FREE_TICKER = "^TNX"
+_RISK_FREE_START = "1990-01-01"
+# Longest run of missing closes carried forward, in rows of the union
+# calendar: a few exchange holidays, not a suspension.
+MAX_FILL_DAYS = 5
+
+
+@lru_cache(maxsize=1)
+def _risk_free_history(as_of: str) -> tuple[pd.Series, np.ndarray]:
+    """
+    Full ^TNX history up to ``as_of`` as an annualized decimal rate, with the
+    cumulative sum of the rates (prefixed by 0) for O(1) window means.
+    """
+    rates = price_cache.get(_RISK_FREE_TICKER, _RISK_FREE_START, as_of).dropna() / 100
+    return rates, np.concatenate([[0.0], np.cumsum(rates.to_numpy())])
+
+
+def _risk_free_today() -> tuple[pd.Series, np.ndarray]:
+    tomorrow = pd.Timestamp.today().normalize() + pd.offsets.Day(1)
+    return _risk_free_history(tomorrow.strftime("%Y-%m-%d"))
+
 
-@lru_cache
 def get_risk_free_rate(start_date: str, end_date: str) -> float:
-    return (
-        yf.download("^TNX", start=start_date, end=end_date, auto_adjust=True)[
-            "Close"
-        ].mean()
-        / 100
-    ).iloc[0]
+    """Mean annualized risk-free rate over ``[start_date, end_date)``."""
+    rates, cumsum = _risk_free_today()
+    i, j = rates.index.searchsorted([pd.Timestamp(start_date), pd.Timestamp(end_date)])
+    if j <= i:
+        return float("nan")
+    return (cumsum[j] - cumsum[i]) / (j - i)
+
+
+def get_risk_free_rates(index: pd.DatetimeIndex) -> pd.Series:
+    """Annualized risk-free rate in effect on each date of ``index``."""
+    rates, _ = _risk_free_today()
+    return rates.reindex(index, method="ffill")
+
+
+def align_prices(price_df: pd.DataFrame, max_gap: int = MAX_FILL_DAYS) -> pd.DataFrame:
+    """
+    Aligns closes from different listings and exchange calendars, such as
+    London-listed ``.L`` ETFs next to US tickers, on the union of their dates.
+
+    A ticker's last close is carried forward over runs of at most ``max_gap``
+    days it did not trade, which covers one exchange's holidays; days before
+    it was listed and every day of a longer gap stay NaN, never zero. Days
+    without any close are dropped.
+    """
+    price_df = price_df.dropna(how="all")
+    missing = price_df.isna()
+    # Length of the run of missing days each missing day belongs to, counted
+    # from both ends of the run.
+    run_length = _run_position(missing) + _run_position(missing[::-1])[::-1] - 1
+    return price_df.ffill().where(~missing | (run_length <= max_gap))
+
+
+def _run_position(missing: pd.DataFrame) -> pd.DataFrame:
+    """1-based position of each missing day within its run, 0 on present days."""
+    total = missing.cumsum()
+    return total - total.where(~missing).ffill().fillna(0)
+
+
+def get_returns(price_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Daily simple returns of aligned prices, NaN on the days a ticker or its
+    previous close is missing, so estimators can mask them.
+    """
+    return price_df.pct_change(fill_method=None).iloc[1:]
+
+
+@cached(persist=False)
+def _get_close(ticker: str, start_date: str, end_date: str) -> pd.Series:
+    return price_cache.get(ticker, start_date, end_date)
+
+
+@traced()
+def get_prices(
+    tickers: tuple[str], start_date: str, end_date: str, max_workers: int = 8
+) -> pd.DataFrame:
+    """
+    Closes of every distinct ticker, aligned by ``align_prices`` once here so
+    consumers need no filtering of their own, in the order the tickers were
+    given.
+
+    Each ticker is resolved on its own, so overlapping requests from different
+    callers share cached series, and tickers that are not yet in memory are
+    fetched concurrently on up to ``max_workers`` threads.
+    """
+    tickers = tuple(dict.fromkeys(tickers))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as pool:
+        closes = map_in_context(
+            pool, lambda ticker: _get_close(ticker, start_date, end_date), tickers
+        )
+        price_df = pd.concat(dict(zip(tickers, closes)), axis=1)
+
+    return align_prices(price_df.sort_index().reindex(tickers, axis=1))
 
 
-@lru_cache
+@cached()
+@traced()
 def get_data(
     tickers: tuple[str], start_date: str, end_date: str
 ) -> tuple[pd.DataFrame, float]:
@@ -28,11 +121,7 @@ def get_data(
         End date for the data download. ISO format (YYYY-MM-DD).
     """
 
-    price_df = (
-        yf.download(tickers, start=start_date, end=end_date, auto_adjust=True)["Close"]
-        .reindex(tickers, axis=1)
-        .fillna(0)
-    )
+    price_df = get_prices(tickers, start_date, end_date)
 
     risk_free_rate = get_risk_free_rate(start_date, end_date)
 
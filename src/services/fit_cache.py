@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def series_hash(series: pd.Series, spec: str) -> str:
+    """Digest of a series' dates and values together with a model spec."""
+    digest = hashlib.sha256(spec.encode())
+    digest.update(series.index.to_numpy(dtype="datetime64[ns]").tobytes())
+    digest.update(np.ascontiguousarray(series.to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()[:32]
+
+
+def lineage_key(name: str, spec: str) -> str:
+    """Digest of a series name, such as a ticker, together with a model spec."""
+    return hashlib.sha256(f"{spec}:{name}".encode()).hexdigest()[:32]
+
+
+class FitCache:
+    """
+    Fitted model parameters on disk, one JSON file per fitted series, evicted
+    least recently used first once more than ``max_entries`` are stored.
+
+    Entries are named ``<lineage>-<content>.json``: ``content`` identifies the
+    exact input, and ``lineage`` the series it is a window of (a ticker's
+    returns under one model), so that the latest fit of an overlapping
+    window, such as yesterday's rolling window, can seed the next one.
+    """
+
+    def __init__(self, directory: str | Path, max_entries: int = 256):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+
+    def _path(self, lineage: str, content: str) -> Path:
+        return self.directory / f"{lineage}-{content}.json"
+
+    @staticmethod
+    def _load(path: Path) -> dict | None:
+        try:
+            entry = json.loads(path.read_text())
+            # Touching marks the entry as recently used for eviction.
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def get(self, lineage: str, content: str) -> dict | None:
+        return self._load(self._path(lineage, content))
+
+    def latest(self, lineage: str) -> dict | None:
+        """Most recently used entry of ``lineage``, whatever its content."""
+        entries = []
+        for path in self.directory.glob(f"{lineage}-*.json"):
+            # Another process may evict the file between the glob and the stat.
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        return self._load(max(entries)[1]) if entries else None
+
+    def put(self, lineage: str, content: str, entry: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(lineage, content)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(entry))
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        entries.sort()
+        for _, path in entries[: max(0, len(entries) - self.max_entries)]:
+            path.unlink(missing_ok=True)
+
+
+fit_cache = FitCache(
+    os.getenv("FIT_CACHE_DIR", ".cache/fits"),
+    max_entries=int(os.getenv("FIT_CACHE_MAX_ENTRIES", "256")),
+)
@@ -0,0 +1,189 @@
+from dataclasses import dataclass
+
+import cvxpy as cp
+import numpy as np
+import pandas as pd
+from pypfopt.exceptions import OptimizationError
+from scipy.optimize import minimize_scalar
+
+from src.services.covariance import Covariance, CovarianceMethod, estimate_covariance
+from src.services.data import get_returns
+from src.services.result_cache import cached
+from src.services.tracing import traced
+
+_SOLVER_OPTIONS = {"eps_abs": 1e-10, "eps_rel": 1e-10, "polish": True}
+
+
+def _variance(covariance: Covariance, weights: cp.Expression) -> cp.Expression:
+    """Portfolio variance in the covariance's factor form, ``O(tickers * k)`` terms."""
+    variance = cp.sum_squares(covariance.loadings.T @ weights)
+    if np.any(covariance.specific > 0):
+        variance += cp.sum_squares(cp.multiply(np.sqrt(covariance.specific), weights))
+    return variance
+
+
+def _check_solved(problem: cp.Problem, description: str) -> None:
+    if problem.status not in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE):
+        raise OptimizationError(f"{description}: {problem.status}")
+
+
+class FrontierSolver:
+    """
+    Long-only, fully invested minimum-variance portfolio for a target return.
+
+    The problem is compiled once on the covariance's factors; each solve
+    only updates the target and starts from the previous solution, so a
+    sweep of nearby targets costs a few solver iterations per point.
+    """
+
+    def __init__(self, mean_returns: np.ndarray, covariance: Covariance):
+        self.mean_returns = np.asarray(mean_returns, dtype=float)
+        self.covariance = covariance
+        self._weights = cp.Variable(len(self.mean_returns))
+        self._target = cp.Parameter()
+        self._problem = cp.Problem(
+            cp.Minimize(_variance(covariance, self._weights)),
+            [
+                cp.sum(self._weights) == 1,
+                self._weights >= 0,
+                self.mean_returns @ self._weights >= self._target,
+            ],
+        )
+
+    def solve(self, target: float) -> np.ndarray:
+        self._target.value = target
+        self._problem.solve(solver=cp.OSQP, warm_start=True, **_SOLVER_OPTIONS)
+        _check_solved(self._problem, f"Frontier point at target {target:.6g}")
+        weights = np.clip(self._weights.value, 0, None)
+        return weights / weights.sum()
+
+    def performance(self, weights: np.ndarray) -> tuple[float, float]:
+        """Expected return and volatility of ``weights``."""
+        return (
+            float(self.mean_returns @ weights),
+            float(np.sqrt(self.covariance.variance(weights))),
+        )
+
+
+def min_volatility_weights(
+    mean_returns: np.ndarray, covariance: Covariance
+) -> np.ndarray:
+    """Long-only, fully invested portfolio of least variance."""
+    return FrontierSolver(mean_returns, covariance).solve(float(np.min(mean_returns)))
+
+
+def max_sharpe_weights(
+    mean_returns: np.ndarray, covariance: Covariance, risk_free_rate: float = 0.02
+) -> np.ndarray:
+    """
+    Long-only portfolio of highest Sharpe ratio, from the convex problem
+    ``min y'Sy`` subject to ``(mu - rf)'y = 1, y >= 0`` scaled back to sum to
+    one, as solved by pypfopt's ``max_sharpe``.
+    """
+    excess = np.asarray(mean_returns, dtype=float) - risk_free_rate
+    if excess.max() <= 0:
+        raise ValueError(
+            "at least one of the assets must have an expected return exceeding the risk-free rate"
+        )
+    scaled = cp.Variable(len(excess))
+    problem = cp.Problem(
+        cp.Minimize(_variance(covariance, scaled)), [excess @ scaled == 1, scaled >= 0]
+    )
+    problem.solve(solver=cp.OSQP, **_SOLVER_OPTIONS)
+    _check_solved(problem, "Maximum Sharpe ratio portfolio")
+    weights = np.clip(scaled.value, 0, None)
+    return weights / weights.sum()
+
+
+@dataclass(frozen=True)
+class Frontier:
+    """
+    Efficient frontier sampled at increasing target returns.
+
+    ``weights`` has shape ``(assets, points)`` like the strategies' combined
+    weights, so it can be passed to ``calculate_batch_performance_metrics``
+    or ``get_stats`` as is.
+    """
+
+    weights: pd.DataFrame
+    returns: pd.Series
+    volatilities: pd.Series
+    min_variance: pd.Series
+    tangency: pd.Series
+    risk_free_rate: float
+
+    @property
+    def sharpe_ratios(self) -> pd.Series:
+        return (self.returns - self.risk_free_rate) / self.volatilities
+
+
+def frontier_from_moments(
+    mean_returns: pd.Series,
+    covariance: Covariance,
+    n_points: int = 200,
+    risk_free_rate: float = 0.02,
+) -> Frontier:
+    """
+    Samples the frontier at ``n_points`` target returns evenly spaced between
+    the minimum-variance portfolio and the highest-returning asset.
+
+    The minimum-variance portfolio is the first solve. The tangency
+    portfolio refines the best Sharpe ratio of the sweep between its
+    neighbours, Sharpe ratio being unimodal along the frontier.
+    """
+    solver = FrontierSolver(mean_returns.to_numpy(), covariance)
+    min_variance = solver.solve(float(mean_returns.min()))
+    low = solver.performance(min_variance)[0]
+    targets = np.linspace(low, float(mean_returns.max()), n_points)
+
+    points = [min_variance]
+    points.extend(solver.solve(target) for target in targets[1:])
+    weights = np.column_stack(points)
+    returns = mean_returns.to_numpy() @ weights
+    volatilities = np.sqrt(covariance.variance(weights))
+
+    def negative_sharpe(target: float) -> float:
+        ret, vol = solver.performance(solver.solve(target))
+        return -(ret - risk_free_rate) / vol
+
+    best = int(np.argmax((returns - risk_free_rate) / volatilities))
+    bounds = targets[max(best - 1, 0)], targets[min(best + 1, n_points - 1)]
+    if bounds[0] < bounds[1]:
+        refined = minimize_scalar(
+            negative_sharpe, bounds=bounds, method="bounded", options={"xatol": 1e-9}
+        )
+        tangency = solver.solve(refined.x)
+    else:
+        tangency = weights[:, best]
+
+    columns = pd.Index([f"frontier_{i:03d}" for i in range(n_points)])
+    assets = mean_returns.index
+    return Frontier(
+        weights=pd.DataFrame(weights, index=assets, columns=columns),
+        returns=pd.Series(returns, index=columns),
+        volatilities=pd.Series(volatilities, index=columns),
+        min_variance=pd.Series(min_variance, index=assets, name="min_variance"),
+        tangency=pd.Series(tangency, index=assets, name="tangency"),
+        risk_free_rate=risk_free_rate,
+    )
+
+
+@cached()
+@traced()
+def efficient_frontier(
+    price_df: pd.DataFrame,
+    n_points: int = 200,
+    risk_free_rate: float = 0.02,
+    covariance: CovarianceMethod = "sample",
+) -> Frontier:
+    """
+    Efficient frontier of the historical mean returns of ``price_df`` and of
+    their covariance estimated by ``covariance``.
+    """
+    returns = get_returns(price_df)
+    return frontier_from_moments(
+        returns.mean() * 252,
+        estimate_covariance(returns, covariance),
+        n_points,
+        risk_free_rate,
+    )
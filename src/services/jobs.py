@@ -0,0 +1,92 @@
+import inspect
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from src.services.result_cache import MISSING
+from src.services.tracing import Trace, trace
+
+
+class Job:
+    """A computation running in the background, with its reported progress."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.future: Future | None = None
+        self.progress = 0.0
+        self.message = ""
+        self.trace = Trace()
+
+    def report(self, progress: float, message: str = "") -> None:
+        self.progress = min(max(progress, 0.0), 1.0)
+        self.message = message
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def failed(self) -> bool:
+        return self.future.done() and self.future.exception() is not None
+
+    def result(self):
+        return self.future.result()
+
+    def run(self, fn: Callable, *args, **kwargs):
+        with trace(self.trace):
+            return fn(*args, **kwargs)
+
+
+class JobRunner:
+    """
+    Runs keyed computations on a shared thread pool and keeps their results.
+
+    Submitting a key that is already running or finished returns the existing
+    job, so every rerun and every session asking for the same inputs shares
+    one computation. Only the ``max_finished`` most recently used finished
+    jobs are kept, and failed ones are retried on the next submission.
+    """
+
+    def __init__(self, max_workers: int = 2, max_finished: int = 64):
+        self.max_finished = max_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, fn: Callable, *args, **kwargs) -> Job:
+        """
+        Starts ``fn(*args, **kwargs)`` under ``key`` unless it already exists.
+        If ``fn`` takes a ``report`` argument it is given ``Job.report``. A
+        ``cached`` function whose result is already stored finishes at once.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.failed():
+                self._jobs.move_to_end(key)
+                return job
+
+            job = Job(key)
+            peek = getattr(fn, "peek", None)
+            if peek is not None and (value := peek(*args, **kwargs)) is not MISSING:
+                job.future = Future()
+                job.future.set_result(value)
+                job.report(1.0)
+            else:
+                if "report" in inspect.signature(fn).parameters:
+                    kwargs["report"] = job.report
+                job.future = self._pool.submit(job.run, fn, *args, **kwargs)
+            self._jobs[key] = job
+            self._evict()
+            return job
+
+    def recent(self) -> list[Job]:
+        """Known jobs, most recently submitted or reused last."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _evict(self) -> None:
+        finished = [key for key, job in self._jobs.items() if job.done()]
+        for key in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[key]
+
+
+jobs = JobRunner()
@@ -0,0 +1,171 @@
+from collections.abc import Callable
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from src.services.result_cache import cached
+from src.services.tracing import traced
+
+
+def _masked_mean_std(x: np.ndarray, mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Column means and sample standard deviations of ``x`` over ``mask``."""
+    count = np.count_nonzero(mask, axis=0)
+    mean = np.where(mask, x, 0).sum(axis=0) / count
+    deviation = np.where(mask, x - mean, 0)
+    return mean, np.sqrt(np.einsum("ij,ij->j", deviation, deviation) / (count - 1))
+
+
+def portfolio_values(prices: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    ``prices @ weights`` for prices of shape ``(days, assets)`` with gaps: a
+    missing price voids a day only for the portfolios holding that asset,
+    rather than for all of them through ``NaN * 0``.
+    """
+    missing = np.isnan(prices)
+    if not missing.any():
+        return prices @ weights
+    values = np.where(missing, 0, prices) @ weights
+    values[missing @ (weights != 0)] = np.nan
+    return values
+
+
+def weighted_portfolios(frame: pd.DataFrame, weights: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aligned prices or returns of shape ``(days, tickers)`` combined by weights
+    of shape ``(tickers, portfolios)``, see ``portfolio_values``.
+    """
+    matrix = weights.reindex(frame.columns).fillna(0).to_numpy(dtype=float)
+    return pd.DataFrame(
+        portfolio_values(frame.to_numpy(dtype=float), matrix),
+        index=frame.index,
+        columns=weights.columns,
+    )
+
+
+class PortfolioPaths:
+    """
+    Value paths of many portfolios, shape ``(days, portfolios)``, with the
+    intermediate series every metric is built from computed once, on demand.
+
+    Days where a portfolio's return is undefined are NaN and skipped by each
+    reduction, like ``dropna`` on a single portfolio's series.
+    """
+
+    def __init__(self, values: np.ndarray, risk_free_rate: float | np.ndarray):
+        self.values = values
+        # Constant, or one annualized rate per day broadcast across portfolios.
+        self.risk_free_rate = (
+            np.asarray(risk_free_rate, dtype=float)[1:, None]
+            if np.ndim(risk_free_rate)
+            else risk_free_rate
+        )
+
+    @cached_property
+    def returns(self) -> np.ndarray:
+        return self.values[1:] / self.values[:-1] - 1
+
+    @cached_property
+    def valid(self) -> np.ndarray:
+        return ~np.isnan(self.returns)
+
+    @cached_property
+    def n_returns(self) -> np.ndarray:
+        return np.count_nonzero(self.valid, axis=0)
+
+    @cached_property
+    def log_returns(self) -> np.ndarray:
+        return np.log1p(self.returns)
+
+    @cached_property
+    def excess_returns(self) -> np.ndarray:
+        return self.log_returns - self.risk_free_rate / 252
+
+    @cached_property
+    def excess_mean_std(self) -> tuple[np.ndarray, np.ndarray]:
+        return _masked_mean_std(self.excess_returns, self.valid)
+
+    @cached_property
+    def annualised_return(self) -> np.ndarray:
+        return np.nanprod(1 + self.returns, axis=0) ** (252 / self.n_returns) - 1
+
+    @cached_property
+    def max_drawdown(self) -> np.ndarray:
+        peaks = np.fmax.accumulate(self.values, axis=0)
+        return np.nanmin((self.values - peaks) / peaks, axis=0)
+
+
+def _annualised_volatility(paths: PortfolioPaths) -> np.ndarray:
+    return _masked_mean_std(paths.log_returns, paths.valid)[1] * np.sqrt(252)
+
+
+def _sharpe_ratio(paths: PortfolioPaths) -> np.ndarray:
+    mean, std = paths.excess_mean_std
+    return mean / std * np.sqrt(252)
+
+
+def _sortino_ratio(paths: PortfolioPaths) -> np.ndarray:
+    excess = paths.excess_returns
+    mean, _ = paths.excess_mean_std
+    _, downside_std = _masked_mean_std(excess, paths.valid & (excess < 0))
+    return mean / downside_std * np.sqrt(252)
+
+
+METRICS: dict[str, Callable[[PortfolioPaths], np.ndarray]] = {
+    "Annualized Return": lambda paths: paths.annualised_return,
+    "Annualized Volatility": _annualised_volatility,
+    "Sharpe Ratio": _sharpe_ratio,
+    "Sortino Ratio": _sortino_ratio,
+    "Max Drawdown": lambda paths: paths.max_drawdown,
+    "Calmar Ratio": lambda paths: paths.annualised_return / np.abs(paths.max_drawdown),
+}
+"""Metric name to a function of ``PortfolioPaths`` giving one value per portfolio."""
+
+
+@cached()
+@traced()
+def calculate_batch_performance_metrics(
+    price_df: pd.DataFrame,
+    weights: pd.DataFrame,
+    risk_free_rate: float | pd.Series = 0.02,
+    metrics: dict[str, Callable[[PortfolioPaths], np.ndarray]] | None = None,
+    chunk_size: int = 1000,
+) -> pd.DataFrame:
+    """
+    Parameters
+    ----------
+    price_df : pd.DataFrame
+        Prices of shape ``(days, assets)``.
+    weights : pd.DataFrame
+        Weights of shape ``(assets, portfolios)``, matched to ``price_df`` by
+        position.
+    risk_free_rate : float | pd.Series
+        Constant annualized rate, or annualized rates by date.
+    metrics : dict, optional
+        Metrics to compute, ``METRICS`` by default.
+    chunk_size : int
+        Portfolios evaluated per pass, bounding the ``(days, chunk_size)``
+        temporaries.
+
+    Returns
+    -------
+    pd.DataFrame
+        Metrics of shape ``(metrics, portfolios)``.
+    """
+    metrics = metrics or METRICS
+    if isinstance(risk_free_rate, pd.Series):
+        risk_free_rate = risk_free_rate.reindex(price_df.index).to_numpy()
+
+    prices = price_df.to_numpy(dtype=float)
+    weight_matrix = weights.to_numpy(dtype=float)
+    results = []
+    for start in range(0, weight_matrix.shape[1], chunk_size):
+        paths = PortfolioPaths(
+            portfolio_values(prices, weight_matrix[:, start : start + chunk_size]),
+            risk_free_rate,
+        )
+        results.append(np.vstack([metric(paths) for metric in metrics.values()]))
+
+    return pd.DataFrame(
+        np.hstack(results), index=list(metrics), columns=weights.columns
+    )
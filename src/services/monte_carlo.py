@@ -1,89 +1,1201 @@
+import multiprocessing
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Literal, get_args
+
 import numpy as np
 import pandas as pd
 from arch import arch_model
-from copulas.univariate import StudentTUnivariate
+from scipy import stats
+from scipy.special import gammaln, ndtri
+
+from src.services.covariance import Covariance, CovarianceMethod, estimate_covariance
+from src.services.fit_cache import fit_cache, lineage_key, series_hash
+from src.services.result_cache import cached
+from src.services.tracing import count, span, traced
+
+# Seed of every simulation not given one, so reruns reproduce their results.
+DEFAULT_SEED = 1234
+# An int or SeedSequence fixes the run; None draws fresh OS entropy.
+Seed = int | np.random.SeedSequence | None
+
+# Floor for a simulated daily simple return, so that log1p stays finite when a
+# heavy-tailed draw would otherwise take the price through zero.
+_MIN_SIMPLE_RETURN = -1 + 1e-12
+# Rows of innovations drawn per Generator call, bounds the sampling temporary.
+_DRAW_CHUNK_DAYS = 252
+# Paths per Latin hypercube group of stratified sampling. Groups are the
+# independent units of the standard errors, so this trades stratification for
+# units to estimate them from.
+_STRATUM_PATHS = 50
+# Probabilities whose events fall in fewer independent units than this get the
+# Agresti-Coull binomial standard error: linearizing over a handful of events
+# understates the error several fold, most of all with antithetic pairs.
+_MIN_EVENT_UNITS = 10
+# Identifies the model in fit cache keys; change it whenever the fit changes.
+_GARCH_SPEC = "arch_model(vol=Garch,p=1,q=1,dist=t)+t.fit(std_resid)"
+# Quantiles of the annualized returns reported by get_stats, and the levels of
+# its value at risk and conditional value at risk. The 5% quantile is the
+# ``var`` row, so it is not repeated as ``p5``.
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75, 0.95)
+DEFAULT_TAIL_LEVELS = (0.05,)
+
+# Opt-in variance reduction of simulate_stats, see its docstring.
+VarianceReduction = Literal["antithetic", "stratified", "control_variate"]
+VARIANCE_REDUCTIONS: tuple[VarianceReduction, ...] = get_args(VarianceReduction)
+
+
+@dataclass(frozen=True)
+class GarchFit:
+    """GARCH(1,1) parameters (in percent returns) plus the last conditional state."""
+
+    mu: float
+    omega: float
+    alpha: float
+    beta: float
+    t_df: float
+    t_loc: float
+    t_scale: float
+    last_resid: float
+    last_vol: float
+    last_price: float
+
+
+def seed_sequence(seed: Seed = DEFAULT_SEED) -> np.random.SeedSequence:
+    """``seed`` as the root ``SeedSequence`` of a run."""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def child_seed(seed: np.random.SeedSequence, *indices: int) -> np.random.SeedSequence:
+    """
+    The descendant of ``seed`` that ``SeedSequence.spawn`` hands out at
+    ``indices`` (child ``indices[0]``, then its child ``indices[1]``, ...).
+
+    Unlike ``spawn``, it depends on the indices alone and not on how many
+    children were spawned before, so any process can derive the stream of
+    any chunk or asset in any order.
+    """
+    return np.random.SeedSequence(
+        seed.entropy,
+        spawn_key=(*seed.spawn_key, *indices),
+        pool_size=seed.pool_size,
+    )
+
+
+def _warm_start(lineage: str, returns: pd.Series) -> dict | None:
+    """
+    Latest cached fit of the same ticker over a window overlapping that of
+    ``returns``. A rolling window that moved since, dropping old days and
+    appending new ones, fits to nearby parameters.
+    """
+    entry = fit_cache.latest(lineage)
+    if entry is None or "start" not in entry:
+        return None
+    start, end = returns.index[0], returns.index[-1]
+    if pd.Timestamp(entry["start"]) > end or pd.Timestamp(entry["end"]) < start:
+        return None
+    return entry
+
+
+def _fit_garch(price_df: pd.DataFrame | pd.Series) -> tuple[GarchFit, pd.Series]:
+    prices = (
+        price_df.squeeze(axis=1) if isinstance(price_df, pd.DataFrame) else price_df
+    ).dropna()
+    # Each ticker is fitted on its own history, whatever its listing date.
+    returns = 100 * prices.pct_change().dropna()
+    model = arch_model(returns, vol="Garch", p=1, q=1, dist="t")
+
+    lineage = lineage_key(str(returns.name), _GARCH_SPEC)
+    content = series_hash(returns, _GARCH_SPEC)
+    entry = fit_cache.get(lineage, content)
+    count("fit_cache.hit" if entry is not None else "fit_cache.miss")
+    warm = None if entry is not None else _warm_start(lineage, returns)
+    if warm is not None:
+        count("fit_cache.warm")
+    if entry is not None:
+        # Re-running the variance recursion at known parameters is cheap.
+        res = model.fix(pd.Series(entry["params"]))
+    elif warm is not None:
+        starting_values = np.array(list(warm["params"].values()))
+        res = model.fit(disp="off", starting_values=starting_values)
+    else:
+        res = model.fit(disp="off")
+
+    standardized_resid = res.resid / res.conditional_volatility
+    standardized_resid = standardized_resid.dropna()
+    if entry is not None:
+        t_params = entry["t_params"]
+    else:
+        guess = warm["t_params"] if warm is not None else None
+        df, loc, scale = stats.t.fit(
+            standardized_resid.values,
+            *([guess["df"]] if guess else []),
+            **({"loc": guess["loc"], "scale": guess["scale"]} if guess else {}),
+        )
+        t_params = {"df": float(df), "loc": float(loc), "scale": float(scale)}
+        fit_cache.put(
+            lineage,
+            content,
+            {
+                "content": content,
+                "n_obs": len(returns),
+                "start": returns.index[0].isoformat(),
+                "end": returns.index[-1].isoformat(),
+                "params": {key: float(value) for key, value in res.params.items()},
+                "t_params": t_params,
+            },
+        )
+
+    fit = GarchFit(
+        mu=float(res.params["mu"]),
+        omega=float(res.params["omega"]),
+        alpha=float(res.params["alpha[1]"]),
+        beta=float(res.params["beta[1]"]),
+        t_df=t_params["df"],
+        t_loc=t_params["loc"],
+        t_scale=t_params["scale"],
+        last_resid=float(res.resid.iloc[-1]),
+        last_vol=float(res.conditional_volatility.iloc[-1]),
+        last_price=float(prices.iloc[-1]),
+    )
+    return fit, standardized_resid
+
+
+def fit_garch(price_df: pd.DataFrame | pd.Series) -> GarchFit:
+    return _fit_garch(price_df)[0]
+
+
+def _process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Pool of ``max_workers`` spawned processes. Forking copies the locks other
+    threads hold, so it is unsafe from the threads of Streamlit and the job
+    runner that call into the simulation.
+    """
+    return ProcessPoolExecutor(
+        max_workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+@traced()
+def fit_garch_many(
+    price_df: pd.DataFrame,
+    max_workers: int = 1,
+    covariance: CovarianceMethod = "sample",
+) -> tuple[list[GarchFit], np.ndarray | Covariance]:
+    """
+    Fits every column of ``price_df`` and returns the fits, in column order,
+    with the correlation of the standardized residuals: the sample
+    correlation matrix over each pair's common days, or the ``covariance``
+    estimate rescaled to a correlation in its factor form.
+
+    The fits run in this process unless ``max_workers`` opts into a pool of
+    spawned processes, see ``_process_pool``.
+    """
+    columns = [price_df[ticker] for ticker in price_df.columns]
+    if len(columns) == 1 or max_workers <= 1:
+        results = [_fit_garch(column) for column in columns]
+    else:
+        with _process_pool(max_workers) as pool:
+            results = list(pool.map(_fit_garch, columns))
+
+    fits = [fit for fit, _ in results]
+    residuals = pd.concat([resid for _, resid in results], axis=1)
+    if covariance != "sample":
+        return fits, estimate_covariance(residuals, covariance).correlation()
+    corr = residuals.corr().to_numpy()
+
+    return fits, corr
+
+
+def _draw_innovations(
+    rng: np.random.Generator, df, loc, scale, out: np.ndarray
+) -> np.ndarray:
+    """Fills ``out`` (days first) with Student-t draws, ``_DRAW_CHUNK_DAYS`` rows at a time."""
+    for start in range(0, out.shape[0], _DRAW_CHUNK_DAYS):
+        block = out[start : start + _DRAW_CHUNK_DAYS]
+        block[...] = rng.standard_t(df, size=block.shape)
+        block *= scale
+        block += loc
+    return out
+
+
+def _t_mixing_factor(df: np.ndarray) -> np.ndarray:
+    """
+    Ratio by which dividing a normal by an independent ``sqrt(chi2(df) / df)``
+    shrinks its correlation with another such variable, per asset.
+    """
+    df = np.asarray(df, dtype=float)
+    factor = np.ones_like(df)
+    finite = df > 2
+    nu = df[finite]
+    factor[finite] = np.sqrt((nu - 2) / 2) * np.exp(
+        gammaln((nu - 1) / 2) - gammaln(nu / 2)
+    )
+    return factor
+
+
+def _normal_cholesky(corr: np.ndarray, df: np.ndarray) -> np.ndarray:
+    """
+    Cholesky factor of the normal correlation that, after per-asset Student-t
+    mixing, reproduces ``corr`` as closely as a valid correlation matrix allows.
+    """
+    factor = _t_mixing_factor(df)
+    target = corr / np.outer(factor, factor)
+    np.fill_diagonal(target, 1)
+
+    eigval, eigvec = np.linalg.eigh(target)
+    target = (eigvec * np.maximum(eigval, 1e-8)) @ eigvec.T
+    scale = np.sqrt(np.diag(target))
+    target /= np.outer(scale, scale)
+
+    return np.linalg.cholesky(target)
 
-np.random.seed(1234)
 
+def _normal_factors(corr: Covariance, df: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Loadings and specific standard deviations of the normal correlation
+    that, after Student-t mixing, reproduces the factor-form ``corr``; the
+    counterpart of ``_normal_cholesky`` in ``O(assets * k)``. A row whose
+    loadings would exceed unit variance is shrunk to leave a tiny specific part.
+    """
+    loadings = corr.loadings / _t_mixing_factor(df)[:, None]
+    norms = np.sqrt(np.sum(loadings**2, axis=1))
+    loadings *= np.minimum(1, np.sqrt(1 - 1e-8) / np.maximum(norms, 1e-300))[:, None]
+    return loadings, np.sqrt(1 - np.sum(loadings**2, axis=1))
 
+
+def _base_draws(sims: int, antithetic: bool) -> int:
+    """Independent draws behind ``sims`` paths; the rest mirror them."""
+    return -(-sims // 2) if antithetic else sims
+
+
+def _mirrored(draws: np.ndarray, sims: int, sign: int) -> np.ndarray:
+    """``draws`` of shape ``(days, base)`` followed by ``sign`` times their first ``sims - base`` columns."""
+    return np.concatenate([draws, sign * draws[:, : sims - draws.shape[1]]], axis=1)
+
+
+def _stratified_normals(
+    stream: np.random.Generator, days: int, sims: int
+) -> np.ndarray:
+    """
+    Latin hypercube normals of shape ``(days, sims)``: within each group of
+    ``_STRATUM_PATHS`` paths, a day's draws fall one in each of as many
+    equiprobable strata, in random order.
+    """
+    uniforms = stream.random((days, sims))
+    for start in range(0, sims, _STRATUM_PATHS):
+        group = uniforms[:, start : start + _STRATUM_PATHS]
+        size = group.shape[1]
+        group += stream.permuted(np.broadcast_to(np.arange(size), group.shape), axis=1)
+        group /= size
+    return ndtri(uniforms)
+
+
+def _standard_normals(
+    streams: list[np.random.Generator],
+    shape: tuple[int, int, int],
+    antithetic: bool = False,
+    stratified: bool = False,
+) -> np.ndarray:
+    """
+    Normals of shape ``(days, len(streams), sims)``, each column from its own
+    stream, Latin hypercube if ``stratified`` and with the second half of the
+    paths negating the first if ``antithetic``.
+    """
+    days, _, sims = shape
+    base = _base_draws(sims, antithetic)
+    normals = np.empty(shape)
+    for i, stream in enumerate(streams):
+        if stratified:
+            draws = _stratified_normals(stream, days, base)
+        else:
+            draws = stream.standard_normal((days, base))
+        normals[:, i] = _mirrored(draws, sims, -1) if antithetic else draws
+    return normals
+
+
+def sampling_units(
+    sims: int, antithetic: bool = False, stratified: bool = False
+) -> np.ndarray:
+    """
+    Per path of a chunk of ``sims``, the index of the independent unit it
+    belongs to: the path itself, its antithetic pair, or its Latin hypercube
+    group together with the group's mirrors. Standard errors are computed
+    over these units, since paths within one are not independent.
+    """
+    draws = np.arange(sims) % _base_draws(sims, antithetic)
+    return draws // _STRATUM_PATHS if stratified else draws
+
+
+def _draw_correlated_innovations(
+    seed: np.random.SeedSequence,
+    fits: list[GarchFit],
+    corr: np.ndarray | Covariance,
+    out: np.ndarray,
+    antithetic: bool = False,
+    stratified: bool = False,
+) -> np.ndarray:
+    """
+    Fills ``out`` of shape ``(days, assets, sims)`` with Student-t draws whose
+    cross-asset correlation follows ``corr``, ``_DRAW_CHUNK_DAYS`` rows at a time.
+    A low-rank ``Covariance`` draws one normal per factor and one per asset
+    instead of multiplying by an ``(assets, assets)`` Cholesky factor.
+
+    Asset ``i`` draws its normals and chi-squares from ``child_seed(seed, i)``
+    and factor ``j`` from ``child_seed(seed, assets + j)``. ``antithetic``
+    pairs each path with one of negated normals and the same chi-squares, so
+    the pair's Student-t draws are mirrored around ``loc``; ``stratified``
+    draws the normals by Latin hypercube, see ``_stratified_normals``.
+    """
+    df = np.array([fit.t_df for fit in fits])[:, None]
+    loc = np.array([fit.t_loc for fit in fits])[:, None]
+    scale = np.array([fit.t_scale for fit in fits])[:, None]
+    low_rank = isinstance(corr, Covariance) and corr.n_factors < len(fits)
+    if low_rank:
+        loadings, specific = _normal_factors(corr, df[:, 0])
+    else:
+        if isinstance(corr, Covariance):
+            corr = corr.to_frame().to_numpy()
+        chol = _normal_cholesky(corr, df[:, 0])
+
+    n_assets = len(fits)
+    streams = [np.random.default_rng(child_seed(seed, i)) for i in range(n_assets)]
+    if low_rank:
+        factor_streams = [
+            np.random.default_rng(child_seed(seed, n_assets + j))
+            for j in range(loadings.shape[1])
+        ]
+
+    for start in range(0, out.shape[0], _DRAW_CHUNK_DAYS):
+        block = out[start : start + _DRAW_CHUNK_DAYS]
+        days, _, sims = block.shape
+        normals = _standard_normals(streams, block.shape, antithetic, stratified)
+        if low_rank:
+            factors = _standard_normals(
+                factor_streams,
+                (days, len(factor_streams), sims),
+                antithetic,
+                stratified,
+            )
+            np.matmul(loadings, factors, out=block)
+            normals *= specific[:, None]
+            block += normals
+        else:
+            np.matmul(chol, normals, out=block)
+        base = _base_draws(sims, antithetic)
+        for i, stream in enumerate(streams):
+            chi2 = stream.chisquare(df[i, 0], size=(days, base))
+            if antithetic:
+                chi2 = _mirrored(chi2, sims, 1)
+            block[:, i] /= np.sqrt(chi2 / df[i])
+        block *= scale
+        block += loc
+    return out
+
+
+def _garch_kernel(
+    z: np.ndarray,
+    mu,
+    omega,
+    alpha,
+    beta,
+    last_resid,
+    last_vol,
+    loc=0.0,
+    martingale: np.ndarray | None = None,
+    martingale_days: Sequence[int] = (),
+) -> np.ndarray:
+    """
+    Runs the GARCH(1,1) recursion over standardized innovations ``z`` and
+    overwrites them, in place, with the daily log returns.
+
+    ``z`` is indexed days first; the parameters are scalars or arrays that
+    broadcast against ``z[t]``, so the same kernel serves one asset or many.
+
+    If ``martingale`` is given, ``martingale[k]`` receives the product up to
+    day ``martingale_days[k]`` of ``1 + (mu + sigma * (z - loc)) / 100``: the
+    price ratio with the innovations' mean ``loc`` removed, whose expectation
+    is exactly ``(1 + mu / 100) ** days`` whatever the volatility path.
+    """
+    shape = z.shape[1:]
+    eps = np.array(np.broadcast_to(last_resid, shape), dtype=z.dtype)
+    sigma2 = np.array(np.broadcast_to(np.square(last_vol), shape), dtype=z.dtype)
+    if martingale is not None:
+        ratio = np.ones(shape, dtype=z.dtype)
+        step = np.empty(shape, dtype=z.dtype)
+        recorded = list(zip(martingale_days, martingale))
+
+    for t in range(z.shape[0]):
+        np.multiply(eps, eps, out=eps)
+        eps *= alpha
+        sigma2 *= beta
+        sigma2 += eps
+        sigma2 += omega
+        np.sqrt(sigma2, out=eps)
+        if martingale is not None:
+            np.multiply(eps, loc, out=step)
+        eps *= z[t]
+        z[t] = eps
+        if martingale is not None:
+            np.subtract(eps, step, out=step)
+            step += mu
+            step /= 100
+            step += 1
+            ratio *= step
+            for day, target in recorded:
+                if day == t + 1:
+                    target[...] = ratio
+
+    z += mu
+    z /= 100
+    np.maximum(z, _MIN_SIMPLE_RETURN, out=z)
+    np.log1p(z, out=z)
+    return z
+
+
+def simulate_log_paths(
+    fit: GarchFit,
+    n_simulations: int = 1000,
+    trading_days: int = 2520,
+    seed: Seed = DEFAULT_SEED,
+    innovations: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Parameters
+    ----------
+    fit : GarchFit
+        Fitted model, see ``fit_garch``.
+    n_simulations : int
+        Number of simulated paths.
+    trading_days : int
+        Number of simulated days.
+    seed : int | np.random.SeedSequence, optional
+        Seed of the Student-t innovations, see ``seed_sequence``.
+    innovations : np.ndarray, optional
+        Pre-drawn standardized innovations of shape
+        ``(trading_days, n_simulations)``, used instead of drawing from ``seed``.
+
+    Returns
+    -------
+    np.ndarray
+        Cumulative log returns of shape ``(trading_days + 1, n_simulations)``,
+        with the first row at zero.
+
+    Notes
+    -----
+    The recursion loops over days only, each step vectorized over the paths,
+    so drawing the Student-t innovations dominates: 10,000 paths over 2,520
+    days take about 2 s on one core, 1.5 s of them in ``standard_t`` and
+    0.3 s in the recursion, against tens of seconds for the per-day sampler
+    this replaced.
+    """
+    log_paths = np.empty((trading_days + 1, n_simulations))
+    log_paths[0] = 0
+
+    if innovations is not None:
+        log_paths[1:] = innovations
+    else:
+        rng = np.random.default_rng(seed_sequence(seed))
+        _draw_innovations(rng, fit.t_df, fit.t_loc, fit.t_scale, log_paths[1:])
+
+    _garch_kernel(
+        log_paths[1:],
+        fit.mu,
+        fit.omega,
+        fit.alpha,
+        fit.beta,
+        fit.last_resid,
+        fit.last_vol,
+    )
+    np.cumsum(log_paths, axis=0, out=log_paths)
+
+    return log_paths
+
+
+@traced()
 def get_simulated_prices(
     price_df: pd.DataFrame,
     n_simulations: int = 1000,
     n_years: int = 10,
     trading_days_in_year: int = 252,
+    seed: Seed = DEFAULT_SEED,
 ) -> np.ndarray:
-    returns = 100 * price_df.pct_change().dropna()
-    model = arch_model(returns, vol="Garch", p=1, q=1, dist="t")
-    res = model.fit(disp="off")
+    fit = fit_garch(price_df)
+    log_paths = simulate_log_paths(
+        fit, n_simulations, trading_days_in_year * n_years, seed=seed
+    )
+    return fit.last_price * np.exp(log_paths, out=log_paths)
 
-    standardized_resid = res.resid / res.conditional_volatility
-    standardized_resid = standardized_resid.dropna()
-    student_t = StudentTUnivariate()
-    student_t.fit(standardized_resid.values)
 
-    mu = res.params["mu"]
-    omega = res.params["omega"]
-    alpha = res.params["alpha[1]"]
-    beta = res.params["beta[1]"]
+def simulate_joint_log_paths(
+    fits: list[GarchFit],
+    corr: np.ndarray | Covariance,
+    n_simulations: int = 1000,
+    trading_days: int = 2520,
+    seed: Seed = DEFAULT_SEED,
+    out: np.ndarray | None = None,
+    antithetic: bool = False,
+    stratified: bool = False,
+    martingale: np.ndarray | None = None,
+    martingale_days: Sequence[int] = (),
+) -> np.ndarray:
+    """
+    Parameters
+    ----------
+    fits : list[GarchFit]
+        One fitted model per asset, see ``fit_garch_many``.
+    corr : np.ndarray | Covariance
+        Correlation of the assets' standardized residuals, see ``fit_garch_many``.
+    n_simulations : int
+        Number of simulated paths.
+    trading_days : int
+        Number of simulated days.
+    seed : int | np.random.SeedSequence, optional
+        Seed of the innovations; each asset draws from its own child stream,
+        see ``_draw_correlated_innovations``.
+    out : np.ndarray, optional
+        Preallocated array of shape ``(assets, trading_days + 1, n_simulations)``
+        to fill in place.
+    antithetic, stratified : bool
+        Variance reduction of the innovations, see
+        ``_draw_correlated_innovations``.
+    martingale : np.ndarray, optional
+        Array of shape ``(len(martingale_days), assets, n_simulations)`` that
+        receives each path's price ratio without the innovations' mean on
+        ``martingale_days``, the control variate of ``simulate_stats``; see
+        ``_garch_kernel``.
+
+    Returns
+    -------
+    np.ndarray
+        Cumulative log returns of shape ``(assets, trading_days + 1, n_simulations)``,
+        with the first day at zero.
+    """
+    shape = (len(fits), trading_days + 1, n_simulations)
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError(f"Expected out of shape {shape}, got {out.shape}")
+
+    out[:, 0, :] = 0
+    # Days-first view, so each step of the kernel updates every asset at once.
+    days_first = out[:, 1:, :].transpose(1, 0, 2)
+    _draw_correlated_innovations(
+        seed_sequence(seed), fits, corr, days_first, antithetic, stratified
+    )
+
+    def param(name: str) -> np.ndarray:
+        return np.array([getattr(fit, name) for fit in fits])[:, None]
+
+    _garch_kernel(
+        days_first,
+        param("mu"),
+        param("omega"),
+        param("alpha"),
+        param("beta"),
+        param("last_resid"),
+        param("last_vol"),
+        param("t_loc"),
+        martingale,
+        martingale_days,
+    )
+    np.cumsum(out, axis=1, out=out)
 
+    return out
+
+
+def _chunks(n_simulations: int, chunk_size: int) -> Iterator[tuple[int, int, int]]:
+    """Index, first simulation and size of each chunk of ``n_simulations``."""
+    for index, start in enumerate(range(0, n_simulations, chunk_size)):
+        yield index, start, min(chunk_size, n_simulations - start)
+
+
+@traced()
+def get_simulated_cube(
+    price_df: pd.DataFrame,
+    n_simulations: int = 1000,
+    n_years: int = 10,
+    trading_days_in_year: int = 252,
+    seed: Seed = DEFAULT_SEED,
+    max_workers: int = 1,
+    covariance: CovarianceMethod = "sample",
+    chunk_size: int = 250,
+) -> np.ndarray:
+    """
+    Jointly simulates every column of ``price_df`` and returns prices of shape
+    ``(tickers, days + 1, n_simulations)``, as consumed by ``get_stats``. The
+    innovations are correlated by the ``covariance`` estimate of the residuals.
+
+    Chunk ``c`` of ``chunk_size`` paths is drawn from ``child_seed(seed, c)``,
+    so the paths only depend on ``seed`` and ``chunk_size``, and match those of
+    ``get_simulated_compact_cube`` and ``simulate_stats``.
+    """
+    fits, corr = fit_garch_many(price_df, max_workers, covariance)
+    root = seed_sequence(seed)
     trading_days = trading_days_in_year * n_years
+    cube = np.empty((len(fits), trading_days + 1, n_simulations))
+    for index, start, size in _chunks(n_simulations, chunk_size):
+        simulate_joint_log_paths(
+            fits,
+            corr,
+            size,
+            trading_days,
+            seed=child_seed(root, index),
+            out=cube[:, :, start : start + size],
+        )
+    np.exp(cube, out=cube)
+    cube *= np.array([fit.last_price for fit in fits])[:, None, None]
 
-    last_price = price_df.iloc[-1]
-    last_vol = res.conditional_volatility.iloc[-1]
-    last_resid = res.resid.iloc[-1]
+    return cube
 
-    simulated_prices = np.zeros((trading_days + 1, n_simulations))
-    simulated_prices[0, :] = last_price
 
-    eps = np.full(n_simulations, last_resid)
-    sigma = np.full(n_simulations, last_vol)
+@dataclass(frozen=True)
+class CompactCube:
+    """
+    Simulated paths stored as float32 cumulative log returns instead of float64
+    prices, a quarter of the memory of the cube from ``get_simulated_cube``.
 
-    for t in range(1, trading_days + 1):
-        z = student_t.sample(n_simulations)
-        sigma2 = omega + alpha * eps**2 + beta * sigma**2
-        sigma = np.sqrt(sigma2)
-        eps = sigma * z
-        r = mu + eps
-        simulated_prices[t] = simulated_prices[t - 1] * (1 + r / 100)
+    ``log_returns`` has shape ``(tickers, days + 1, n_simulations)`` and may be
+    a memory-mapped ``.npy`` file. Prices are ``last_prices * exp(log_returns)``.
 
-    return simulated_prices
+    Accuracy: each path is simulated in float64 and only the cumulative log
+    return is rounded, so the error does not accumulate over the horizon. The
+    rounding is at most ``2**-24`` of the value, which for a 10-year cumulative
+    log return below 5 in magnitude bounds the relative price error by 3e-7.
+    Statistics from ``get_stats`` agree with the float64 cube to about 1e-7.
+    """
 
+    log_returns: np.ndarray
+    last_prices: np.ndarray
 
-def get_stats(cube: np.ndarray, combined_weights: pd.DataFrame) -> pd.DataFrame:
-    sim_prices = np.tensordot(combined_weights.T.to_numpy(), cube, axes=([1], [0]))
+    @property
+    def n_days(self) -> int:
+        return self.log_returns.shape[1] - 1
 
-    returns = sim_prices[:, 1:, :] / sim_prices[:, :-1, :] - 1
-    returns_3y = returns[:, : 252 * 3, :]
-    cum_returns = (1 + returns).prod(axis=1) - 1
-    cum_returns_3y = (1 + returns_3y).prod(axis=1) - 1
-    annualized_returns = (1 + cum_returns) ** (252 / returns.shape[1]) - 1
-    cutoffs = np.percentile(cum_returns, 5, axis=1)
+    def prices(self, days: list[int] | slice = slice(None)) -> np.ndarray:
+        """Float64 prices on ``days``, shape ``(tickers, len(days), n_simulations)``."""
+        log_returns = self.log_returns[:, days, :].astype(np.float64)
+        return self.last_prices[:, None, None] * np.exp(log_returns, out=log_returns)
 
-    stats = []
-    for i in range(4):
-        ar = annualized_returns[i]
-        cr = cum_returns[i]
-        cr3y = cum_returns_3y[i]
-        cutoff = cutoffs[i]
 
-        stats.append(
-            {
-                "cvar": float(ar[ar <= cutoff].mean()),
-                "10y_shortfall": np.mean(cr < 0),
-                "prob_3y_loss": np.mean(cr3y < -0.3),
-                "mean": ar.mean(),
-                "volatility": ar.std() * np.sqrt(returns.shape[1] / 252),
-                "min": ar.min(),
-                "p5": np.percentile(ar, 5.0),
-                "p25": np.percentile(ar, 25.0),
-                "median": np.median(ar),
-                "p75": np.percentile(ar, 75.0),
-                "p95": np.percentile(ar, 95.0),
-                "max": ar.max(),
-            }
+@traced()
+def get_simulated_compact_cube(
+    price_df: pd.DataFrame,
+    n_simulations: int = 1000,
+    n_years: int = 10,
+    trading_days_in_year: int = 252,
+    seed: Seed = DEFAULT_SEED,
+    max_workers: int = 1,
+    path: str | None = None,
+    chunk_size: int = 250,
+    covariance: CovarianceMethod = "sample",
+) -> CompactCube:
+    """
+    Same simulation as ``get_simulated_cube``, stored as a ``CompactCube``.
+
+    Paths are simulated ``chunk_size`` at a time in a float64 buffer and
+    rounded into the float32 cube, which is written to a memory-mapped
+    ``.npy`` file at ``path`` if given instead of being held in RAM. The draws
+    match ``get_simulated_cube`` with the same ``seed`` and ``chunk_size``.
+    """
+    fits, corr = fit_garch_many(price_df, max_workers, covariance)
+    root = seed_sequence(seed)
+    trading_days = trading_days_in_year * n_years
+    shape = (len(fits), trading_days + 1, n_simulations)
+    if path is None:
+        log_returns = np.empty(shape, dtype=np.float32)
+    else:
+        log_returns = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.float32, shape=shape
         )
 
-    stats_df = pd.DataFrame(stats).T
-    stats_df.columns = combined_weights.columns
+    buffer = None
+    for index, start, size in _chunks(n_simulations, chunk_size):
+        if buffer is None or buffer.shape[2] != size:
+            buffer = np.empty((len(fits), trading_days + 1, size))
+        simulate_joint_log_paths(
+            fits, corr, size, trading_days, seed=child_seed(root, index), out=buffer
+        )
+        log_returns[:, :, start : start + size] = buffer
+
+    if path is not None:
+        log_returns.flush()
+    return CompactCube(log_returns, np.array([fit.last_price for fit in fits]))
+
+
+def iter_simulated_chunks(
+    fits: list[GarchFit],
+    corr: np.ndarray | Covariance,
+    n_simulations: int = 1000,
+    n_years: int = 10,
+    trading_days_in_year: int = 252,
+    chunk_size: int = 250,
+    seed: Seed = DEFAULT_SEED,
+) -> Iterator[np.ndarray]:
+    """
+    Yields simulated prices of shape ``(tickers, days + 1, <= chunk_size)``
+    until ``n_simulations`` paths have been produced, the same paths as
+    ``get_simulated_cube`` with the same ``seed`` and ``chunk_size``.
+
+    The same buffer is refilled for every chunk, so consumers must reduce a
+    chunk before asking for the next one.
+    """
+    root = seed_sequence(seed)
+    last_prices = np.array([fit.last_price for fit in fits])[:, None, None]
+    trading_days = trading_days_in_year * n_years
+    buffer = None
+
+    for index, _, size in _chunks(n_simulations, chunk_size):
+        if buffer is None or buffer.shape[2] != size:
+            buffer = np.empty((len(fits), trading_days + 1, size))
+        simulate_joint_log_paths(
+            fits, corr, size, trading_days, seed=child_seed(root, index), out=buffer
+        )
+        np.exp(buffer, out=buffer)
+        buffer *= last_prices
+        yield buffer
+
+
+def _cumulative_returns(
+    chunk: np.ndarray, weights: np.ndarray, checkpoint: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Cumulative returns of each weighted portfolio over the whole horizon and
+    up to ``checkpoint``, shapes ``(strategies, sims)``.
+
+    Only the three days involved are weighted, since the product of daily
+    returns telescopes to a ratio of portfolio values.
+    """
+    values = np.tensordot(weights, chunk[:, [0, checkpoint, -1], :], axes=([1], [0]))
+    return values[:, 2] / values[:, 0] - 1, values[:, 1] / values[:, 0] - 1
+
+
+def get_stats_streaming(
+    chunks: Iterable[np.ndarray],
+    combined_weights: pd.DataFrame,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    tail_levels: Sequence[float] = DEFAULT_TAIL_LEVELS,
+) -> pd.DataFrame:
+    """
+    Same statistics as ``get_stats``, reduced one chunk of simulations at a
+    time so that only ``(strategies, sims)`` summaries are ever kept.
+
+    Parameters
+    ----------
+    chunks : Iterable[np.ndarray]
+        Simulated prices of shape ``(tickers, days + 1, chunk)``, for instance
+        from ``iter_simulated_chunks``.
+    combined_weights : pd.DataFrame
+        Weights of shape ``(tickers, strategies)``.
+    quantiles, tail_levels : Sequence[float]
+        Quantiles of the annualized returns, and the levels of their value at
+        risk and conditional value at risk, see ``risk_statistics``.
+    """
+    weights = combined_weights.T.to_numpy()
+    cum_returns, cum_returns_3y = [], []
+    n_days = 0
+
+    for chunk in chunks:
+        n_days = chunk.shape[1] - 1
+        cr, cr3y = _cumulative_returns(chunk, weights, min(252 * 3, n_days))
+        cum_returns.append(cr)
+        cum_returns_3y.append(cr3y)
+
+    return _summarize(
+        np.concatenate(cum_returns, axis=1),
+        np.concatenate(cum_returns_3y, axis=1),
+        n_days,
+        combined_weights.columns,
+        quantiles,
+        tail_levels,
+    )
+
+
+def _quantile_name(level: float) -> str:
+    return "median" if level == 0.5 else f"p{level * 100:g}"
+
+
+def _tail_suffix(level: float) -> str:
+    return "" if level == 0.05 else f"_p{level * 100:g}"
+
+
+def _lerp(low: np.ndarray, high: np.ndarray, t: np.ndarray) -> np.ndarray:
+    # Same formula as np.percentile's linear method, so results match exactly.
+    diff = high - low
+    return np.where(t >= 0.5, high - diff * (1 - t), low + diff * t)
+
+
+def risk_statistics(
+    returns: np.ndarray,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    tail_levels: Sequence[float] = DEFAULT_TAIL_LEVELS,
+) -> dict[str, np.ndarray]:
+    """
+    Extremes, quantiles, value at risk and conditional value at risk of
+    ``returns`` of shape ``(strategies, sims)``, one value per strategy, from a
+    single sort along the simulation axis.
+
+    Quantiles interpolate linearly like ``np.percentile`` and are named
+    ``p<percent>`` (``median`` for 0.5). For each tail level, ``var`` is the
+    return at that quantile and ``cvar`` the mean of the returns at or below
+    it; levels other than 5% get a ``_p<percent>`` suffix.
+    """
+    ordered = np.sort(returns, axis=1)
+    n = ordered.shape[1]
+
+    def quantile(level: float) -> np.ndarray:
+        position = level * (n - 1)
+        low = int(np.floor(position))
+        high = min(low + 1, n - 1)
+        return _lerp(ordered[:, low], ordered[:, high], position - low)
+
+    stats = {"min": ordered[:, 0], "max": ordered[:, -1]}
+    for level in quantiles:
+        stats[_quantile_name(level)] = quantile(level)
+
+    prefix_sums = np.cumsum(ordered, axis=1)
+    rows = np.arange(len(ordered))
+    for level in tail_levels:
+        var = quantile(level)
+        # Sorted rows, so the returns at or below VaR are a prefix of each row.
+        n_tail = np.count_nonzero(ordered <= var[:, None], axis=1)
+        suffix = _tail_suffix(level)
+        stats[f"var{suffix}"] = var
+        stats[f"cvar{suffix}"] = prefix_sums[rows, n_tail - 1] / n_tail
+    return stats
+
+
+def _density(values: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Gaussian kernel density of each row of ``values`` at the matching point,
+    with Silverman's rule-of-thumb bandwidth.
+    """
+    bandwidth = 1.06 * values.std(axis=1) * values.shape[1] ** -0.2
+    z = (values - points[:, None]) / bandwidth[:, None]
+    return np.exp(-0.5 * z**2).mean(axis=1) / (bandwidth * np.sqrt(2 * np.pi))
+
+
+def _agresti_coull_se(
+    successes: np.ndarray, trials: int, z: float = 1.96
+) -> np.ndarray:
+    """Half width over ``z`` of the Agresti-Coull interval of a proportion."""
+    n = trials + z**2
+    p = (successes + z**2 / 2) / n
+    return np.sqrt(p * (1 - p) / n)
+
+
+def _summarize(
+    cum_returns: np.ndarray,
+    cum_returns_3y: np.ndarray,
+    n_days: int,
+    columns: pd.Index,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    tail_levels: Sequence[float] = DEFAULT_TAIL_LEVELS,
+    units: np.ndarray | None = None,
+    controls: tuple[np.ndarray, np.ndarray] | None = None,
+) -> pd.DataFrame:
+    """
+    Statistics of each strategy, followed by their standard errors as
+    ``<name>_se`` rows (none for ``min`` and ``max``).
+
+    Standard errors linearize each statistic through its influence function,
+    summed over ``units``, the independent groups of paths (one path each by
+    default, see ``sampling_units``). ``controls`` are the 10-year and 3-year
+    control variates less their known expectation, shape ``(strategies,
+    sims)``; every statistic but the extremes is then corrected by the
+    regression of its influence on the control of its horizon.
+
+    Probabilities of events seen in fewer than ``_MIN_EVENT_UNITS`` units are
+    left uncorrected, with the standard error of the Agresti-Coull interval
+    over all paths pooled as if they were independent, which is conservative.
+    """
+    annualized_returns = (1 + cum_returns) ** (252 / n_days) - 1
+    risk = risk_statistics(annualized_returns, quantiles, tail_levels)
+    n_sims = annualized_returns.shape[1]
+    units = np.arange(n_sims) if units is None else units
+    n_units = int(units.max()) + 1
+    horizon, horizon_3y = controls if controls is not None else (None, None)
+
+    def unit_totals(values: np.ndarray) -> np.ndarray:
+        totals = np.zeros((len(values), n_units))
+        np.add.at(totals, (slice(None), units), values)
+        return totals
+
+    def linearized(
+        estimate: np.ndarray, influence: np.ndarray, control: np.ndarray | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        totals = unit_totals(influence)
+        dof = n_units - 1
+        if control is not None:
+            control_totals = unit_totals(control - control.mean(axis=1, keepdims=True))
+            beta = np.sum(totals * control_totals, axis=1) / np.sum(
+                control_totals**2, axis=1
+            )
+            estimate = estimate - beta * control.mean(axis=1)
+            totals -= beta[:, None] * control_totals
+            dof -= 1
+        return estimate, np.sqrt(np.sum(totals**2, axis=1) * n_units / dof) / n_sims
+
+    def quantile_influence(level: float, value: np.ndarray) -> np.ndarray:
+        below = annualized_returns <= value[:, None]
+        density = _density(annualized_returns, value)
+        return (level - below) / density[:, None]
+
+    influences = {}
+    for level in tail_levels:
+        suffix = _tail_suffix(level)
+        var, cvar = risk[f"var{suffix}"], risk[f"cvar{suffix}"]
+        below = annualized_returns <= var[:, None]
+        influences[f"var{suffix}"] = (var, quantile_influence(level, var), horizon)
+        influences[f"cvar{suffix}"] = (
+            cvar,
+            var[:, None]
+            + (annualized_returns - var[:, None]) * below / level
+            - cvar[:, None],
+            horizon,
+        )
+    proportions = {}
+    for name, events, control in [
+        ("10y_shortfall", cum_returns < 0, horizon),
+        ("prob_3y_loss", cum_returns_3y < -0.3, horizon_3y),
+    ]:
+        probability = np.mean(events, axis=1)
+        influences[name] = (probability, events - probability[:, None], control)
+        proportions[name] = (probability, events)
+    mean = annualized_returns.mean(axis=1)
+    deviations = annualized_returns - mean[:, None]
+    std = annualized_returns.std(axis=1)
+    vol_scale = np.sqrt(n_days / 252)
+    influences["mean"] = (mean, deviations, horizon)
+    influences["volatility"] = (
+        std * vol_scale,
+        vol_scale * (deviations**2 - std[:, None] ** 2) / (2 * std[:, None]),
+        horizon,
+    )
+    for level in quantiles:
+        name = _quantile_name(level)
+        influences[name] = (risk[name], quantile_influence(level, risk[name]), horizon)
+
+    stats, errors = {}, {}
+    for name, (estimate, influence, control) in influences.items():
+        stats[name], errors[f"{name}_se"] = linearized(estimate, influence, control)
+    for name, (probability, events) in proportions.items():
+        few = np.count_nonzero(unit_totals(events), axis=1) < _MIN_EVENT_UNITS
+        stats[name] = np.where(few, probability, np.clip(stats[name], 0, 1))
+        errors[f"{name}_se"] = np.where(
+            few, _agresti_coull_se(events.sum(axis=1), n_sims), errors[f"{name}_se"]
+        )
+
+    ordered = [
+        *(name for name in risk if name.startswith(("var", "cvar"))),
+        "10y_shortfall",
+        "prob_3y_loss",
+        "mean",
+        "volatility",
+        "min",
+        *(_quantile_name(level) for level in quantiles),
+        "max",
+    ]
+    stats |= {"min": risk["min"], "max": risk["max"]}
+    return pd.DataFrame(
+        {**{name: stats[name] for name in ordered}, **errors}, index=columns
+    ).T
+
+
+def _chunk_returns(
+    fits: list[GarchFit],
+    corr: np.ndarray | Covariance,
+    trading_days: int,
+    weights: np.ndarray,
+    variance_reduction: Sequence[VarianceReduction],
+    seed: np.random.SeedSequence,
+    size: int,
+) -> dict[str, np.ndarray]:
+    """
+    Simulates one chunk of ``size`` paths from ``seed`` and reduces it like
+    ``get_stats_streaming``, to each portfolio's cumulative returns and, with
+    ``control_variate``, its control: the same portfolio of the martingale
+    price ratios of ``_garch_kernel``, less its expectation.
+    """
+    checkpoint = min(252 * 3, trading_days)
+    last_prices = np.array([fit.last_price for fit in fits])
+    martingale = None
+    if "control_variate" in variance_reduction:
+        martingale = np.empty((2, len(fits), size))
+    chunk = simulate_joint_log_paths(
+        fits,
+        corr,
+        size,
+        trading_days,
+        seed=seed,
+        antithetic="antithetic" in variance_reduction,
+        stratified="stratified" in variance_reduction,
+        martingale=martingale,
+        martingale_days=(trading_days, checkpoint),
+    )
+    np.exp(chunk, out=chunk)
+    chunk *= last_prices[:, None, None]
+    returns, returns_3y = _cumulative_returns(chunk, weights, checkpoint)
+    reduced = {"returns": returns, "returns_3y": returns_3y}
+
+    if martingale is not None:
+        start_values = weights @ last_prices
+        growth = 1 + np.array([fit.mu for fit in fits]) / 100
+        for name, values, days in [
+            ("control", martingale[0], trading_days),
+            ("control_3y", martingale[1], checkpoint),
+        ]:
+            expected = weights @ (last_prices * growth**days) / start_values
+            reduced[name] = (
+                weights @ (last_prices[:, None] * values) / start_values[:, None]
+                - expected[:, None]
+            )
+    return reduced
+
+
+# An unseeded run draws fresh entropy, so it must not be served a cached one.
+@cached(bypass=lambda arguments: arguments["seed"] is None)
+@traced()
+def simulate_stats(
+    price_df: pd.DataFrame,
+    combined_weights: pd.DataFrame,
+    n_simulations: int = 1000,
+    n_years: int = 10,
+    chunk_size: int = 250,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    tail_levels: Sequence[float] = DEFAULT_TAIL_LEVELS,
+    covariance: CovarianceMethod = "sample",
+    seed: Seed = DEFAULT_SEED,
+    max_workers: int = 1,
+    variance_reduction: Sequence[VarianceReduction] = (),
+    report: Callable[[float, str], None] | None = None,
+) -> pd.DataFrame:
+    """
+    Fits, simulates and reduces in one call, reporting progress after the fit
+    and after every chunk of simulations through ``report(fraction, message)``.
+
+    The fits and the chunks run in this process unless ``max_workers`` opts
+    into a pool of spawned processes, see ``_process_pool``. Each chunk draws from its own child of
+    ``seed``, so the statistics are bit-for-bit the same whatever the number
+    of workers; without variance reduction they are also those of
+    ``get_stats`` of ``get_simulated_cube`` with the same ``seed`` and
+    ``chunk_size``.
+
+    ``variance_reduction`` opts into any of:
+
+    - ``antithetic``: half of each chunk's paths mirror the innovations of
+      the other half.
+    - ``stratified``: Latin hypercube normals across groups of paths.
+    - ``control_variate``: corrects each statistic by its regression on the
+      portfolio's price ratio with the innovations' mean removed, whose
+      expectation follows analytically from the GARCH drift.
+
+    Each statistic comes with its standard error in a ``<name>_se`` row, so
+    the number of paths needed for a given precision can be read off.
+    """
+    unknown = set(variance_reduction) - set(VARIANCE_REDUCTIONS)
+    if unknown:
+        raise ValueError(f"Unknown variance reduction: {sorted(unknown)}")
+    report = report or (lambda progress, message: None)
+    report(0.0, "Fitting GARCH models")
+    fits, corr = fit_garch_many(price_df, max_workers, covariance)
+
+    root = seed_sequence(seed)
+    chunks = list(_chunks(n_simulations, chunk_size))
+    seeds = [child_seed(root, index) for index, _, _ in chunks]
+    sizes = [size for _, _, size in chunks]
+    reduce_chunk = partial(
+        _chunk_returns,
+        fits,
+        corr,
+        n_years * 252,
+        combined_weights.T.to_numpy(),
+        tuple(variance_reduction),
+    )
+
+    def reduced(results: Iterable[dict[str, np.ndarray]]) -> list:
+        collected = []
+        for (_, start, size), result in zip(chunks, results):
+            collected.append(result)
+            done = start + size
+            report(done / n_simulations, f"Simulated {done}/{n_simulations} paths")
+        return collected
+
+    with span(
+        "monte_carlo.simulate_and_reduce",
+        shape=(len(fits), n_years * 252 + 1, n_simulations),
+        chunk_size=chunk_size,
+    ):
+        if len(chunks) == 1 or max_workers <= 1:
+            results = reduced(map(reduce_chunk, seeds, sizes))
+        else:
+            with _process_pool(max_workers) as pool:
+                results = reduced(pool.map(reduce_chunk, seeds, sizes))
+
+        # Units are numbered across chunks, which are independent of each other.
+        units, offset = [], 0
+        for size in sizes:
+            chunk_units = sampling_units(
+                size,
+                "antithetic" in variance_reduction,
+                "stratified" in variance_reduction,
+            )
+            units.append(chunk_units + offset)
+            offset += int(chunk_units.max()) + 1
+
+        def joined(name: str) -> np.ndarray:
+            return np.concatenate([result[name] for result in results], axis=1)
+
+        return _summarize(
+            joined("returns"),
+            joined("returns_3y"),
+            n_years * 252,
+            combined_weights.columns,
+            quantiles,
+            tail_levels,
+            units=np.concatenate(units),
+            controls=(
+                (joined("control"), joined("control_3y"))
+                if "control_variate" in variance_reduction
+                else None
+            ),
+        )
+
+
+@traced()
+def get_stats(
+    cube: np.ndarray | CompactCube,
+    combined_weights: pd.DataFrame,
+    chunk_size: int = 1000,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    tail_levels: Sequence[float] = DEFAULT_TAIL_LEVELS,
+) -> pd.DataFrame:
+    """
+    Statistics of the weighted portfolios over simulated prices of shape
+    ``(tickers, days + 1, n_simulations)``, or over a ``CompactCube``, of which
+    only the days the statistics depend on are read.
+    """
+    if isinstance(cube, CompactCube):
+        checkpoint = min(252 * 3, cube.n_days)
+        prices = cube.prices([0, checkpoint, cube.n_days])
+        cum_returns, cum_returns_3y = _cumulative_returns(
+            prices, combined_weights.T.to_numpy(), 1
+        )
+        return _summarize(
+            cum_returns,
+            cum_returns_3y,
+            cube.n_days,
+            combined_weights.columns,
+            quantiles,
+            tail_levels,
+        )
 
-    return stats_df
+    chunks = (
+        cube[:, :, start : start + chunk_size]
+        for start in range(0, cube.shape[2], chunk_size)
+    )
+    return get_stats_streaming(chunks, combined_weights, quantiles, tail_levels)
@@ -0,0 +1,229 @@
+import logging
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yfinance as yf
+
+from src.services.tracing import count, span
+
+logger = logging.getLogger(__name__)
+
+Downloader = Callable[[str, pd.Timestamp, pd.Timestamp], pd.Series]
+"""Returns the adjusted close of a ticker over ``[start, end)``."""
+
+_COVERAGE_KEY = b"price_cache.coverage"
+# Longest run of weekdays an exchange stays closed, holidays included. An empty
+# download over more weekdays than this is a failure, not a quiet market.
+_MAX_CLOSED_DAYS = 4
+
+
+class PriceDownloadError(RuntimeError):
+    """A download that should have returned closes came back empty."""
+
+
+def yahoo_downloader(ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.Series:
+    # Ticker.history keeps its state per object, unlike yf.download's shared
+    # module globals, so several tickers can be fetched from threads at once.
+    close = yf.Ticker(ticker).history(
+        start=start.strftime("%Y-%m-%d"),
+        end=end.strftime("%Y-%m-%d"),
+        auto_adjust=True,
+    )["Close"]
+    close.index = close.index.tz_localize(None).normalize().rename("Date")
+    return close.rename(ticker)
+
+
+def fixture_downloader(directory: str | Path) -> Downloader:
+    """
+    Serves prices from ``<directory>/<ticker>.csv`` files with ``Date`` and
+    ``Close`` columns, so tests and offline runs never touch Yahoo.
+    """
+    directory = Path(directory)
+
+    def download(ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.Series:
+        close = pd.read_csv(
+            directory / f"{ticker}.csv", index_col="Date", parse_dates=True
+        )["Close"]
+        return close[(close.index >= start) & (close.index < end)].rename(ticker)
+
+    return download
+
+
+class PriceCache:
+    """
+    On-disk store of daily closes, one Parquet file per ticker.
+
+    Each file remembers the contiguous ``[start, end)`` range it has been
+    downloaded for, so that any sub-range is served from disk and a wider
+    request only downloads the missing head or tail.
+
+    Coverage only grows over what a download actually returned: yfinance
+    answers a failed or rate-limited request with an empty frame, which must
+    not be recorded as a range without closes. An empty download that should
+    have contained closes is served from the cached closes with a warning, or
+    raises ``PriceDownloadError`` when there are none.
+
+    History before a ticker's listing is never returned, so the head is
+    downloaded up to and including the first cached close: an answer holding
+    that close and nothing earlier proves the listing date, which is then
+    recorded so earlier starts are covered without downloading.
+    """
+
+    def __init__(self, directory: str | Path, downloader: Downloader):
+        self.directory = Path(directory)
+        self.downloader = downloader
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, ticker: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _path(self, ticker: str) -> Path:
+        return self.directory / f"{quote(ticker, safe='')}.parquet"
+
+    def _read(
+        self, ticker: str
+    ) -> tuple[pd.Series, pd.Timestamp, pd.Timestamp, pd.Timestamp | None] | None:
+        """Cached closes, their coverage ``[start, end)`` and the listing date if known."""
+        path = self._path(ticker)
+        if not path.exists():
+            return None
+        table = pq.read_table(path)
+        start, end, *listed = table.schema.metadata[_COVERAGE_KEY].decode().split("/")
+        return (
+            table.to_pandas()["close"],
+            pd.Timestamp(start),
+            pd.Timestamp(end),
+            pd.Timestamp(listed[0]) if listed else None,
+        )
+
+    def _write(
+        self,
+        ticker: str,
+        close: pd.Series,
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        listed: pd.Timestamp | None,
+    ) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(close.rename("close").to_frame())
+        coverage = [start.isoformat(), end.isoformat()]
+        if listed is not None:
+            coverage.append(listed.isoformat())
+        table = table.replace_schema_metadata(
+            {**table.schema.metadata, _COVERAGE_KEY: "/".join(coverage).encode()}
+        )
+        # Write then rename so a concurrent reader never sees a partial file.
+        path = self._path(ticker)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def _download(
+        self, ticker: str, start: pd.Timestamp, end: pd.Timestamp
+    ) -> pd.Series:
+        with span("price_cache.download", ticker=ticker) as attrs:
+            close = self.downloader(ticker, start, end)
+            attrs["rows"] = len(close)
+        return close
+
+    def get(self, ticker: str, start_date, end_date) -> pd.Series:
+        """
+        Parameters
+        ----------
+        ticker : str
+            Ticker to read.
+        start_date, end_date
+            Anything ``pd.Timestamp`` accepts; the range is ``[start, end)``.
+
+        Concurrent calls for the same ticker are serialized, so the second
+        caller reads what the first one downloaded instead of fetching again.
+        """
+        with self._lock(ticker):
+            return self._get(ticker, start_date, end_date)
+
+    def _get(self, ticker: str, start_date, end_date) -> pd.Series:
+        start = pd.Timestamp(start_date).normalize()
+        # Days from today on may still be revised, so they are never marked covered.
+        end = min(pd.Timestamp(end_date).normalize(), pd.Timestamp.today().normalize())
+
+        cached = self._read(ticker)
+        if cached is None:
+            pieces, covered_start, covered_end, listed = [], start, start, None
+        else:
+            pieces, (covered_start, covered_end, listed) = [cached[0]], cached[1:]
+
+        n_downloads = 0
+        new_start, new_end, new_listed = covered_start, covered_end, listed
+        if start < covered_start and listed is not None:
+            new_start = start
+        elif start < covered_start:
+            first = cached[0].index.min() if len(cached[0]) else covered_start
+            head = self._download(ticker, start, first + pd.offsets.Day(1)).dropna()
+            n_downloads += 1
+            if len(head) and head.index.min() < covered_start:
+                pieces.append(head[head.index < covered_start])
+                new_start = start
+            elif len(head):
+                # The first cached close came back with nothing before it.
+                new_start, new_listed = start, head.index.min()
+            # An empty head is a failed fetch, tried again on the next call.
+        tail_days = _trading_days(covered_end, end)
+        if tail_days > 0:
+            tail = self._download(ticker, covered_end, end).dropna()
+            n_downloads += 1
+            if len(tail):
+                pieces.append(tail)
+                # Only up to the last close returned, so a close published
+                # late is fetched on the next call.
+                new_end = tail.index.max().normalize() + pd.offsets.Day(1)
+                if cached is None:
+                    new_start = start
+            elif tail_days > _MAX_CLOSED_DAYS and not any(map(len, pieces)):
+                raise PriceDownloadError(
+                    f"No closes downloaded for {ticker} between "
+                    f"{covered_end.date()} and {end.date()}"
+                )
+            elif tail_days > _MAX_CLOSED_DAYS:
+                logger.warning(
+                    "No closes downloaded for %s between %s and %s, serving "
+                    "the cached closes up to %s",
+                    ticker,
+                    covered_end.date(),
+                    end.date(),
+                    (covered_end - pd.offsets.Day(1)).date(),
+                )
+        count("price_cache.miss" if n_downloads else "price_cache.hit")
+
+        if not pieces:
+            return pd.Series(dtype=float, name=ticker)
+        close = pd.concat(pieces).sort_index()
+        close = close[~close.index.duplicated(keep="last")]
+        if (new_start, new_end, new_listed) != (covered_start, covered_end, listed):
+            self._write(ticker, close, new_start, new_end, new_listed)
+
+        in_range = (close.index >= start) & (close.index < pd.Timestamp(end_date))
+        return close[in_range].rename(ticker)
+
+
+def _trading_days(start: pd.Timestamp, end: pd.Timestamp) -> int:
+    """Weekdays in ``[start, end)``."""
+    return len(pd.bdate_range(start, end, inclusive="left")) if end > start else 0
+
+
+def _default_downloader() -> Downloader:
+    if fixture_dir := os.getenv("PRICE_FIXTURE_DIR"):
+        return fixture_downloader(fixture_dir)
+    return yahoo_downloader
+
+
+price_cache = PriceCache(
+    os.getenv("PRICE_CACHE_DIR", ".cache/prices"), _default_downloader()
+)
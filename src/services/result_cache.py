@@ -0,0 +1,285 @@
+import datetime
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.services.tracing import count
+
+try:
+    import fcntl
+except ImportError:  # Windows: computations are only shared within a process.
+    fcntl = None
+
+MISSING = object()
+_ISO_DAY = re.compile(r"\d{4}-\d{2}-\d{2}")
+# Lock files idle for longer than this are removed when the disk tier is trimmed.
+_LOCK_FILE_MAX_AGE = 24 * 3600
+
+
+def _canonical(value, digest) -> None:
+    if isinstance(value, pd.DataFrame | pd.Series):
+        digest.update(type(value).__name__.encode())
+        digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+        names = value.columns if isinstance(value, pd.DataFrame) else [value.name]
+        digest.update(repr(list(names)).encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.shape, value.dtype.str)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, datetime.date):
+        # Dates from widgets, Timestamps and ISO strings of a day all agree.
+        digest.update(pd.Timestamp(value).strftime("%Y-%m-%d").encode())
+    elif isinstance(value, list | tuple):
+        digest.update(b"[")
+        for item in value:
+            _canonical(item, digest)
+            digest.update(b",")
+        digest.update(b"]")
+    elif isinstance(value, dict):
+        digest.update(b"{")
+        for key in sorted(value, key=repr):
+            _canonical(key, digest)
+            digest.update(b":")
+            _canonical(value[key], digest)
+            digest.update(b",")
+        digest.update(b"}")
+    elif isinstance(value, str) and _ISO_DAY.fullmatch(value):
+        digest.update(value.encode())
+    else:
+        digest.update(repr(value).encode())
+
+
+def canonical_key(*parts) -> str:
+    """
+    Digest of pandas objects, arrays, dates and plain values that is equal for
+    equal inputs regardless of how they were constructed.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        _canonical(part, digest)
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Results shared by every session of this process and, through ``directory``,
+    by every worker process on the machine.
+
+    Entries expire after their TTL. The in-memory tier keeps the
+    ``max_entries`` most recently used results, and the on-disk tier is
+    trimmed, least recently used first, to ``max_bytes``.
+    """
+
+    def __init__(
+        self, directory: str | Path, max_entries: int = 128, max_bytes: int = 2**29
+    ):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._memory: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._memory_lock = threading.Lock()
+        # Lock of each key being computed and the number of its holders and
+        # waiters, dropped when the last one leaves.
+        self._key_locks: dict[str, tuple[threading.Lock, list[int]]] = {}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key: str, persist: bool = True):
+        """Cached value of ``key``, or ``MISSING``."""
+        now = time.time()
+        with self._memory_lock:
+            if key in self._memory:
+                expires_at, value = self._memory[key]
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    return value
+                del self._memory[key]
+
+        if not persist:
+            return MISSING
+        path = self._path(key)
+        try:
+            expires_at, value = pickle.loads(path.read_bytes())
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return MISSING
+        if expires_at <= now:
+            path.unlink(missing_ok=True)
+            return MISSING
+        os.utime(path)
+        self._remember(key, expires_at, value)
+        return value
+
+    def set(self, key: str, value, ttl: float, persist: bool = True) -> None:
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, value)
+        if not persist:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(pickle.dumps((expires_at, value)))
+        os.replace(tmp_path, path)
+        self._trim_disk()
+
+    def clear(self) -> None:
+        """Drops every entry, in memory and on disk."""
+        with self._memory_lock:
+            self._memory.clear()
+        for path in self.directory.glob("*.pkl"):
+            path.unlink(missing_ok=True)
+
+    def _remember(self, key: str, expires_at: float, value) -> None:
+        with self._memory_lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _trim_disk(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+        if fcntl is None:
+            return
+        stale = time.time() - _LOCK_FILE_MAX_AGE
+        for path in (self.directory / "locks").glob("*.lock"):
+            try:
+                if path.stat().st_mtime >= stale:
+                    continue
+                with open(path, "a") as lock_file:
+                    # Only a lock file nobody holds is removed; see _lock_file
+                    # for the waiters that opened it before the removal.
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    path.unlink(missing_ok=True)
+            except OSError:
+                continue
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Held by one computation of ``key`` at a time, across processes too."""
+        with self._memory_lock:
+            key_lock, users = self._key_locks.setdefault(key, (threading.Lock(), [0]))
+            users[0] += 1
+        try:
+            with key_lock:
+                if fcntl is None:
+                    yield
+                else:
+                    with self._lock_file(key):
+                        yield
+        finally:
+            with self._memory_lock:
+                users[0] -= 1
+                if not users[0]:
+                    del self._key_locks[key]
+
+    @contextmanager
+    def _lock_file(self, key: str) -> Iterator[None]:
+        lock_dir = self.directory / "locks"
+        lock_dir.mkdir(parents=True, exist_ok=True)
+        path = lock_dir / f"{key}.lock"
+        while True:
+            with open(path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # _trim_disk may have removed the file while this process
+                # waited; a lock on the removed file excludes nobody.
+                try:
+                    current = (
+                        os.stat(path).st_ino == os.fstat(lock_file.fileno()).st_ino
+                    )
+                except FileNotFoundError:
+                    current = False
+                try:
+                    if current:
+                        yield
+                        return
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+result_cache = ResultCache(
+    os.getenv("RESULT_CACHE_DIR", ".cache/results"),
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "128")),
+    max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", str(2**29))),
+)
+_DEFAULT_TTL = float(os.getenv("RESULT_CACHE_TTL", str(12 * 3600)))
+
+
+def cached(
+    ttl: float = _DEFAULT_TTL,
+    persist: bool = True,
+    bypass: Callable[[dict], bool] | None = None,
+) -> Callable:
+    """
+    Memoizes a function in ``result_cache`` under its name and canonicalized
+    arguments, ignoring a ``report`` progress callback. Concurrent callers with
+    the same arguments wait for the first one instead of recomputing.
+
+    Calls for which ``bypass(arguments)`` is true, given the bound arguments
+    with their defaults, are computed every time, e.g. unseeded simulations.
+
+    The wrapped function gets a ``peek(*args, **kwargs)`` returning the cached
+    value or ``MISSING`` without computing anything.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        def key_for(*args, **kwargs) -> str | None:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            if bypass is not None and bypass(bound.arguments):
+                return None
+            bound.arguments.pop("report", None)
+            return canonical_key(name, dict(bound.arguments))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = key_for(*args, **kwargs)
+            if key is None:
+                return fn(*args, **kwargs)
+            value = result_cache.get(key, persist)
+            if value is not MISSING:
+                count("result_cache.hit")
+                return value
+            with result_cache.lock(key):
+                value = result_cache.get(key, persist)
+                if value is MISSING:
+                    count("result_cache.miss")
+                    value = fn(*args, **kwargs)
+                    result_cache.set(key, value, ttl, persist)
+            return value
+
+        def peek(*args, **kwargs):
+            key = key_for(*args, **kwargs)
+            return MISSING if key is None else result_cache.get(key, persist)
+
+        wrapper.peek = peek
+        return wrapper
+
+    return decorator
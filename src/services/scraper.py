@@ -1,35 +1,178 @@
 import json
+import logging
+import os
 import re
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Literal
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from src.services.tracing import count, map_in_context, span
+
+logger = logging.getLogger(__name__)
+
+PortfolioName = Literal["equity100", "core-balanced", "core-growth", "core-defensive"]
+
+_URL = "https://www.syfe.com/core/{}"
+_PORTFOLIO_DATA = re.compile(r"portfolioDataStringified\s\=\s\`(.+)\`")
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:137.0) Gecko/20100101 Firefox/137.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Referer": "https://www.syfe.com/core",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "same-origin",
+    "Priority": "u=0, i",
+    "Pragma": "no-cache",
+    "Cache-Control": "no-cache",
+}
+
+
+def parse_portfolio_page(html: str) -> dict:
+    match = _PORTFOLIO_DATA.search(html)
+    if match is None:
+        raise ValueError("No portfolio data found in the page")
+    return json.loads(match.group(1).replace("&quot;", '"'))
+
+
+class CorePortfolioScraper:
+    """
+    Portfolio data scraped from the Syfe core portfolio pages.
+
+    The parsed data of each portfolio is kept on disk in ``directory`` and
+    served for ``ttl`` seconds. After that the page is revalidated with its
+    ETag and Last-Modified date, so an unchanged page is neither downloaded
+    nor parsed again. If a fetch fails the last good data is served.
+
+    With a ``fixture_dir`` the network is never used: each portfolio is read
+    from ``<name>.json`` (the parsed data) or ``<name>.html`` (the page).
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        ttl: float = 6 * 3600,
+        timeout: float = 10.0,
+        fixture_dir: str | Path | None = None,
+    ):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.fixture_dir = Path(fixture_dir) if fixture_dir else None
+        self._session = requests.Session()
+        self._session.headers.update(_HEADERS)
+        self._session.mount("https://", HTTPAdapter(pool_maxsize=8))
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, name: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"{name}.json"
+
+    def _read(self, name: str) -> dict | None:
+        try:
+            return json.loads(self._path(name).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, name: str, entry: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(name)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(entry))
+        os.replace(tmp_path, path)
+
+    def _read_fixture(self, name: str) -> dict:
+        json_path = self.fixture_dir / f"{name}.json"
+        if json_path.exists():
+            return json.loads(json_path.read_text())
+        return parse_portfolio_page((self.fixture_dir / f"{name}.html").read_text())
+
+    def get(self, name: PortfolioName) -> dict:
+        if self.fixture_dir is not None:
+            return self._read_fixture(name)
+        with self._lock(name):
+            return self._get(name)
+
+    def _get(self, name: PortfolioName) -> dict:
+        entry = self._read(name)
+        if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+            count("scraper.hit")
+            return entry["data"]
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            with span("scraper.fetch", portfolio=name) as attrs:
+                response = self._session.get(
+                    _URL.format(name), headers=headers, timeout=self.timeout
+                )
+                attrs["status"] = response.status_code
+            if response.status_code == 304 and entry is not None:
+                count("scraper.revalidated")
+                data = entry["data"]
+            else:
+                response.raise_for_status()
+                count("scraper.miss")
+                data = parse_portfolio_page(response.text)
+        except (requests.RequestException, ValueError):
+            if entry is None:
+                raise
+            logger.warning(
+                "Fetching core portfolio %s failed, serving the data from %s",
+                name,
+                time.ctime(entry["fetched_at"]),
+                exc_info=True,
+            )
+            count("scraper.stale")
+            return entry["data"]
+
+        self._write(
+            name,
+            {
+                "fetched_at": time.time(),
+                "etag": response.headers.get("ETag", entry and entry.get("etag")),
+                "last_modified": response.headers.get(
+                    "Last-Modified", entry and entry.get("last_modified")
+                ),
+                "data": data,
+            },
+        )
+        return data
+
+    def get_many(self, names: Iterable[PortfolioName]) -> dict[str, dict]:
+        """Data of every portfolio in ``names``, fetched concurrently."""
+        names = list(names)
+        with ThreadPoolExecutor(max_workers=max(1, len(names))) as pool:
+            return dict(zip(names, map_in_context(pool, self.get, names), strict=True))
+
+
+core_portfolio_scraper = CorePortfolioScraper(
+    os.getenv("CORE_PORTFOLIO_CACHE_DIR", ".cache/core_portfolios"),
+    ttl=float(os.getenv("CORE_PORTFOLIO_TTL", str(6 * 3600))),
+    fixture_dir=os.getenv("CORE_PORTFOLIO_FIXTURE_DIR"),
+)
+
+
+def scrape_core_portfolio(portf_name: PortfolioName) -> dict:
+    return core_portfolio_scraper.get(portf_name)
 
 
-def scrape_core_portfolio(
-    portf_name: Literal["equity100", "core-balanced", "core-growth", "core-defensive"],
-):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:137.0) Gecko/20100101 Firefox/137.0",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Referer": "https://www.syfe.com/core",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-        "Sec-Fetch-Dest": "document",
-        "Sec-Fetch-Mode": "navigate",
-        "Sec-Fetch-Site": "same-origin",
-        "Priority": "u=0, i",
-        "Pragma": "no-cache",
-        "Cache-Control": "no-cache",
-    }
-
-    response = requests.get(
-        f"https://www.syfe.com/core/{portf_name}",
-        # cookies=cookies,
-        headers=headers,
-    )
-
-    return json.loads(
-        re.search(r"portfolioDataStringified\s\=\s\`(.+)\`", response.text)
-        .group(1)
-        .replace("&quot;", '"')
-    )
+def scrape_core_portfolios(names: Iterable[PortfolioName]) -> dict[str, dict]:
+    return core_portfolio_scraper.get_many(names)
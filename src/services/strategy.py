@@ -1,40 +1,122 @@
-from typing import Literal
+import multiprocessing
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property, partial
+from typing import Literal, get_args
 
 import numpy as np
 import pandas as pd
-from pypfopt import EfficientFrontier, HRPOpt
-from scipy.optimize import minimize
+from pypfopt import HRPOpt
+
+from src.services.covariance import Covariance, CovarianceMethod, estimate_covariance
+from src.services.data import get_returns
+from src.services.frontier import max_sharpe_weights, min_volatility_weights
+from src.services.metrics import calculate_batch_performance_metrics
+from src.services.result_cache import cached
+from src.services.tracing import traced
 
 
 def get_cum_ret(df: pd.DataFrame) -> pd.DataFrame:
     return (1 + df).cumprod()
 
 
-def risk_parity_strategy(price_df: pd.DataFrame):
-    def risk_parity_objective(weights: pd.DataFrame, cov_matrix: pd.DataFrame):
-        variance = weights @ cov_matrix @ weights.T
-        marginal_contribution = cov_matrix @ weights
-        risk_contribution = np.multiply(weights, marginal_contribution) / variance
-        target_risk = np.mean(risk_contribution)
-        return np.sum((risk_contribution - target_risk) ** 2)
+StrategyType = Literal[
+    "max_sharpe",
+    "min_volatility",
+    "risk_parity",
+    "hierarchical_risk_parity",
+]
+STRATEGIES: tuple[StrategyType, ...] = get_args(StrategyType)
+
+
+@dataclass(frozen=True)
+class StrategyContext:
+    """Inputs shared by every optimizer, computed once per price frame."""
+
+    daily_returns: pd.DataFrame
+    mean_hist_ret: pd.Series
+    covariance: Covariance
+
+    @cached_property
+    def cov_matrix(self) -> pd.DataFrame:
+        """Dense covariance, for the optimizers that need every pair (HRP)."""
+        return self.covariance.to_frame()
+
+
+def build_context(
+    price_df: pd.DataFrame, covariance: CovarianceMethod = "sample"
+) -> StrategyContext:
+    returns = get_returns(price_df)
+    return StrategyContext(
+        daily_returns=returns,
+        mean_hist_ret=returns.mean() * 252,
+        covariance=estimate_covariance(returns, covariance),
+    )
+
+
+def risk_parity_weights(
+    cov_matrix: np.ndarray | Covariance,
+    risk_budget: np.ndarray | None = None,
+    tol: float = 1e-12,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """
+    Weights whose risk contributions match ``risk_budget`` (equal by default).
+
+    Solves the convex problem ``min 0.5 y'Sy - b'log(y)`` (Spinu, 2013) with
+    Newton steps on its analytic gradient and Hessian; normalizing the
+    minimizer to sum to one gives the risk parity portfolio. A ``Covariance``
+    is used in its factor form, each Newton step costing ``O(tickers * k**2)``.
+    """
+    if isinstance(cov_matrix, Covariance):
+        covariance = cov_matrix
+    else:
+        covariance = Covariance.from_matrix(np.asarray(cov_matrix, dtype=float))
+    n_assets = len(covariance.tickers)
+    budget = (
+        np.full(n_assets, 1 / n_assets)
+        if risk_budget is None
+        else np.asarray(risk_budget, dtype=float) / np.sum(risk_budget)
+    )
+
+    def objective(y: np.ndarray) -> float:
+        return 0.5 * covariance.variance(y) - budget @ np.log(y)
 
-    cov_matrix = price_df.pct_change().dropna().cov() * 252
-    weights = np.ones(len(cov_matrix)) / len(cov_matrix)
+    y = 1 / np.sqrt(covariance.diagonal())
+    y *= np.sqrt(budget.sum() / covariance.variance(y))
+    for _ in range(max_iter):
+        gradient = covariance.dot(y) - budget / y
+        step = covariance.solve(gradient, budget / y**2)
+        decrement = gradient @ step
+        if decrement / 2 <= tol:
+            break
 
-    return minimize(
-        risk_parity_objective,
-        weights,
-        args=(cov_matrix,),
-        method="SLSQP",
-        bounds=[(0, 1)] * len(cov_matrix),
-        constraints={"type": "eq", "fun": lambda x: np.sum(x) - 1},
-    ).x
+        # Backtrack to stay inside y > 0 with sufficient decrease.
+        t = 1.0
+        while np.any(y - t * step <= 0):
+            t /= 2
+        f_y = objective(y)
+        while objective(y - t * step) > f_y - 0.25 * t * decrement:
+            t /= 2
+        y = y - t * step
+
+    return y / y.sum()
+
+
+def risk_parity_strategy(
+    price_df: pd.DataFrame, context: StrategyContext | None = None
+):
+    context = context or build_context(price_df)
+    return risk_parity_weights(context.covariance)
 
 
-def hierarchical_risk_parity_strategy(price_df: pd.DataFrame):
-    daily_returns = price_df.pct_change().dropna()
-    cov_matrix = price_df.pct_change().dropna().cov() * 252
-    opt = HRPOpt(daily_returns, cov_matrix)
+def hierarchical_risk_parity_strategy(
+    price_df: pd.DataFrame, context: StrategyContext | None = None
+):
+    context = context or build_context(price_df)
+    # Given returns, HRPOpt would ignore the covariance estimate.
+    opt = HRPOpt(cov_matrix=context.cov_matrix)
     opt.optimize()
     optimised_weights = opt.clean_weights()
     optimised_weights_df = pd.DataFrame.from_dict(
@@ -47,47 +129,49 @@ def efficient_frontier_strategy(
     price_df: pd.DataFrame,
     type_: Literal["max_sharpe", "min_volatility"],
     risk_free_rate: float = 0.02,
+    context: StrategyContext | None = None,
 ):
-    mean_hist_ret = price_df.pct_change().dropna().mean() * 252
-    cov_matrix = price_df.pct_change().dropna().cov() * 252
-    opt = EfficientFrontier(mean_hist_ret, cov_matrix)
+    context = context or build_context(price_df)
+    mean_returns = context.mean_hist_ret.to_numpy()
     match type_:
         case "max_sharpe":
-            opt.max_sharpe(risk_free_rate=risk_free_rate)
+            weights = max_sharpe_weights(
+                mean_returns, context.covariance, risk_free_rate
+            )
         case "min_volatility":
-            opt.min_volatility()
+            weights = min_volatility_weights(mean_returns, context.covariance)
         case _:
             raise ValueError(f"Unknown strategy: {type_}")
-    optimised_weights = opt.clean_weights()
-    optimised_weights_df = pd.DataFrame.from_dict(
-        optimised_weights, orient="index", columns=["weight"]
+    # Cleaned like pypfopt's clean_weights.
+    weights[weights < 1e-4] = 0
+    return pd.DataFrame(
+        np.round(weights, 5), index=context.mean_hist_ret.index, columns=["weight"]
     )
-    return optimised_weights_df
 
 
+@traced()
 def strategy(
     price_df: pd.DataFrame,
-    type_: Literal[
-        "max_sharpe",
-        "min_volatility",
-        "risk_parity",
-        "hierarchical_risk_parity",
-    ],
+    type_: StrategyType,
     risk_free_rate: float = 0.02,
+    context: StrategyContext | None = None,
 ):
+    context = context or build_context(price_df)
     weights: pd.DataFrame
     match type_:
         case "max_sharpe":
             weights = efficient_frontier_strategy(
-                price_df, "max_sharpe", risk_free_rate
+                price_df, "max_sharpe", risk_free_rate, context=context
             )
         case "min_volatility":
-            weights = efficient_frontier_strategy(price_df, "min_volatility")
+            weights = efficient_frontier_strategy(
+                price_df, "min_volatility", context=context
+            )
         case "hierarchical_risk_parity":
-            weights = hierarchical_risk_parity_strategy(price_df)
+            weights = hierarchical_risk_parity_strategy(price_df, context=context)
         case "risk_parity":
             weights = pd.DataFrame(
-                risk_parity_strategy(price_df),
+                risk_parity_strategy(price_df, context=context),
                 index=price_df.columns,
                 columns=["weight"],
             )
@@ -99,26 +183,57 @@ def strategy(
     return weights
 
 
+def _run_strategy(
+    price_df: pd.DataFrame,
+    context: StrategyContext,
+    risk_free_rate: float,
+    type_: StrategyType,
+) -> pd.DataFrame:
+    return strategy(price_df, type_, risk_free_rate, context=context)
+
+
+@cached()
+@traced()
+def run_strategies(
+    price_df: pd.DataFrame,
+    types: Sequence[StrategyType] = STRATEGIES,
+    risk_free_rate: float = 0.02,
+    max_workers: int = 1,
+    covariance: CovarianceMethod = "sample",
+) -> pd.DataFrame:
+    """
+    Runs every strategy in ``types`` against one shared ``StrategyContext``
+    with the ``covariance`` estimate and returns the weights of shape
+    ``(tickers, strategies)`` with tickers missing from any strategy dropped.
+
+    The strategies run in this process unless ``max_workers`` opts into a
+    process pool, whose workers are spawned rather than forked so that it is
+    safe to start from the threads of Streamlit and the job runner.
+    """
+    context = build_context(price_df, covariance)
+    run = partial(_run_strategy, price_df, context, risk_free_rate)
+    if len(types) == 1 or max_workers <= 1:
+        weights = [run(type_) for type_ in types]
+    else:
+        with ProcessPoolExecutor(
+            max_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            weights = list(pool.map(run, types))
+
+    return pd.concat(weights, axis=1).dropna()
+
+
 def calculate_performance_metrics(
-    actual_price_df: pd.DataFrame, weights: pd.DataFrame, risk_free_rate=0.02
+    actual_price_df: pd.DataFrame,
+    weights: pd.DataFrame,
+    risk_free_rate: float | pd.Series = 0.02,
 ):
-    price_df = (actual_price_df @ weights.to_numpy().T)[0]
-    returns = (price_df).pct_change().dropna()
-    annualised_returns = (1 + returns).prod() ** (252 / len(returns)) - 1
-    log_returns: pd.Series = np.log(1 + returns).dropna()
-    annualised_vol = log_returns.std() * np.sqrt(252)
-    excess_returns = log_returns - risk_free_rate / 252
-    sharpe_ratio = (excess_returns.mean() / excess_returns.std()) * np.sqrt(252)
-    downside_returns = excess_returns[excess_returns < 0]
-    sortino_ratio = (excess_returns.mean() / downside_returns.std()) * np.sqrt(252)
-    max_drawdown = ((price_df - price_df.cummax()) / price_df.cummax()).min()
-    calmar_ratio = annualised_returns / abs(max_drawdown)
-
-    return {
-        "Annualized Return": annualised_returns,
-        "Annualized Volatility": annualised_vol,
-        "Sharpe Ratio": sharpe_ratio,
-        "Sortino Ratio": sortino_ratio,
-        "Max Drawdown": max_drawdown,
-        "Calmar Ratio": calmar_ratio,
-    }
+    """
+    ``risk_free_rate`` is either a constant annualized rate or a series of
+    annualized rates by date, as returned by ``data.get_risk_free_rates``.
+    """
+    return (
+        calculate_batch_performance_metrics(actual_price_df, weights.T, risk_free_rate)
+        .iloc[:, 0]
+        .to_dict()
+    )
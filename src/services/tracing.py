@@ -0,0 +1,173 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # The sampling profiler is optional.
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+if os.getenv("TRACE_LOG"):
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+
+@dataclass
+class Span:
+    name: str
+    depth: int
+    start: float
+    seconds: float = 0.0
+    attrs: dict = field(default_factory=dict)
+
+
+@dataclass
+class Trace:
+    """Spans and counters recorded while the trace is current."""
+
+    spans: list[Span] = field(default_factory=list)
+    counters: Counter = field(default_factory=Counter)
+
+    def spans_frame(self) -> pd.DataFrame:
+        """One row per span in start order, names indented by nesting depth."""
+        origin = min((span.start for span in self.spans), default=0.0)
+        return pd.DataFrame(
+            [
+                {
+                    "span": "  " * span.depth + span.name,
+                    "start_ms": (span.start - origin) * 1000,
+                    "ms": span.seconds * 1000,
+                    **{key: str(value) for key, value in span.attrs.items()},
+                }
+                for span in sorted(self.spans, key=lambda span: span.start)
+            ]
+        )
+
+
+_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar(
+    "trace", default=None
+)
+_depth: contextvars.ContextVar[int] = contextvars.ContextVar("depth", default=0)
+# Counts since the process started, across every trace.
+totals: Counter = Counter()
+_totals_lock = threading.Lock()
+
+
+@contextmanager
+def trace(current: Trace | None = None) -> Iterator[Trace]:
+    """Makes ``current``, or a new ``Trace``, collect what is recorded inside."""
+    current = current or Trace()
+    token = _trace.set(current)
+    try:
+        yield current
+    finally:
+        _trace.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[dict]:
+    """
+    Times the block as ``name``. The yielded dict holds the span's attributes,
+    so array shapes or sizes known only inside the block can be added to it.
+    Every finished span is logged as one JSON line.
+    """
+    depth = _depth.get()
+    record = Span(name, depth, time.perf_counter(), attrs=dict(attrs))
+    token = _depth.set(depth + 1)
+    try:
+        yield record.attrs
+    finally:
+        _depth.reset(token)
+        record.seconds = time.perf_counter() - record.start
+        if (current := _trace.get()) is not None:
+            current.spans.append(record)
+        logger.info(
+            json.dumps(
+                {
+                    "span": name,
+                    "depth": depth,
+                    "ms": round(record.seconds * 1000, 3),
+                    "thread": threading.current_thread().name,
+                    **record.attrs,
+                },
+                default=str,
+            )
+        )
+
+
+def count(name: str, n: int = 1) -> None:
+    """Adds ``n`` to the counter ``name``, e.g. ``"result_cache.hit"``."""
+    current = _trace.get()
+    # Worker threads run by map_in_context share the caller's trace.
+    with _totals_lock:
+        if current is not None:
+            current.counters[name] += n
+        totals[name] += n
+
+
+def map_in_context(pool: Executor, fn: Callable, items: Iterable) -> list:
+    """
+    ``list(pool.map(fn, items))``, with each call run in a copy of the
+    caller's context. Threads do not inherit context variables, so without
+    it spans and counters recorded by the workers would miss the caller's
+    trace; with it they join it, nested under the caller's current span.
+    """
+    futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def traced(name: str | None = None) -> Callable:
+    """Wraps a function in a ``span``, recording the shape of its result if any."""
+
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name) as attrs:
+                result = fn(*args, **kwargs)
+                if (shape := getattr(result, "shape", None)) is not None:
+                    attrs["shape"] = tuple(shape)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def profile(enabled: bool = True) -> Iterator[dict]:
+    """
+    Runs the block under the sampling profiler when ``enabled`` and
+    pyinstrument is installed. The yielded dict receives the report as
+    ``"text"`` once the block has finished.
+    """
+    report = {}
+    if not enabled or Profiler is None:
+        yield report
+        return
+    profiler = Profiler(interval=0.001)
+    profiler.start()
+    try:
+        yield report
+    finally:
+        profiler.stop()
+        report["text"] = profiler.output_text(unicode=True, show_all=False)
+
+
+def profiler_available() -> bool:
+    return Profiler is not None
@@ -0,0 +1,32 @@
+"""
+Runs every test offline: prices and core portfolio pages come from the
+recordings in ``tests/fixtures``, and the caches live in a temporary
+directory. The environment is set before ``src`` is imported, since the
+services build their module-level caches from it.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+FIXTURES = Path(__file__).with_name("fixtures")
+
+_cache_root = Path(tempfile.mkdtemp(prefix="syfe-tests-"))
+os.environ["PRICE_FIXTURE_DIR"] = str(FIXTURES / "prices")
+os.environ["CORE_PORTFOLIO_FIXTURE_DIR"] = str(FIXTURES / "core_portfolios")
+os.environ["PRICE_CACHE_DIR"] = str(_cache_root / "prices")
+os.environ["CORE_PORTFOLIO_CACHE_DIR"] = str(_cache_root / "core_portfolios")
+os.environ["FIT_CACHE_DIR"] = str(_cache_root / "fits")
+os.environ["RESULT_CACHE_DIR"] = str(_cache_root / "results")
+
+
+@pytest.fixture
+def price_fixtures() -> Path:
+    return FIXTURES / "prices"
+
+
+@pytest.fixture
+def core_portfolio_fixtures() -> Path:
+    return FIXTURES / "core_portfolios"
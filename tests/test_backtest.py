@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.backtest import (
+    RollingMoments,
+    _rates_at,
+    _window_contexts,
+    rebalance_positions,
+    walk_forward_backtest,
+)
+from src.services.covariance import compute_covariance
+from src.services.data import align_prices, get_returns
+from src.services.price_cache import fixture_downloader
+
+
+@pytest.fixture
+def price_df(price_fixtures):
+    download = fixture_downloader(price_fixtures)
+    start, end = pd.Timestamp("2020-01-01"), pd.Timestamp("2024-01-01")
+    return align_prices(
+        pd.concat(
+            {ticker: download(ticker, start, end) for ticker in ("SPY", "TLT", "GLD")},
+            axis=1,
+        )
+    )
+
+
+def test_rates_are_those_known_at_each_rebalance():
+    rates = pd.Series(
+        [0.01, 0.02, 0.05],
+        index=pd.to_datetime(["2021-01-04", "2021-02-01", "2021-03-01"]),
+    )
+    dates = pd.to_datetime(["2020-12-31", "2021-01-29", "2021-02-26", "2021-03-31"])
+    np.testing.assert_array_equal(_rates_at(rates, dates), [0.0, 0.01, 0.02, 0.05])
+    np.testing.assert_array_equal(_rates_at(0.03, dates), [0.03] * 4)
+
+
+def test_max_sharpe_ignores_rates_after_each_rebalance(price_df):
+    rates = pd.Series(0.01, index=price_df.index)
+    later = rates.copy()
+    later["2023-01-01":] = 0.2
+    kwargs = {"types": ("max_sharpe",), "rebalance": "Q", "max_workers": 1}
+    before = walk_forward_backtest(price_df, risk_free_rate=rates, **kwargs)
+    after = walk_forward_backtest(price_df, risk_free_rate=later, **kwargs)
+
+    weights, changed = before.weights["max_sharpe"], after.weights["max_sharpe"]
+    pd.testing.assert_frame_equal(weights[:"2022-12-31"], changed[:"2022-12-31"])
+
+
+def test_windows_use_the_chosen_estimator(price_df):
+    daily_returns = get_returns(price_df)
+    positions = rebalance_positions(daily_returns.index, "Q", min_history=252)
+    contexts = _window_contexts(daily_returns, positions, 252, "ledoit_wolf")
+
+    last = daily_returns.iloc[positions[-1] - 252 : positions[-1]]
+    np.testing.assert_allclose(
+        contexts[-1].covariance.to_frame(),
+        compute_covariance(last, "ledoit_wolf").to_frame(),
+    )
+
+
+def test_gaps_do_not_drop_days(price_df):
+    gapped = price_df.copy()
+    gapped.loc["2022-03-01":"2022-03-31", "GLD"] = np.nan
+    result = walk_forward_backtest(
+        gapped, types=("min_volatility",), rebalance="Q", max_workers=1
+    )
+    # Every day is kept, the other tickers' moves included.
+    index = get_returns(gapped).index
+    assert result.returns.index.equals(index[index >= result.returns.index[0]])
+    assert result.returns.notna().all().all()
+
+
+def test_rolling_moments_match_a_fresh_window():
+    rng = np.random.default_rng(0)
+    # Offset returns, where a naive sum of squares would cancel.
+    values = 0.5 + rng.normal(scale=0.01, size=(600, 4))
+    moments = RollingMoments(4)
+    moments.add(values[:250])
+    for start in range(0, 300, 50):
+        moments.add(values[start + 250 : start + 300])
+        moments.remove(values[start : start + 50])
+        window = values[start + 50 : start + 300]
+
+        np.testing.assert_allclose(moments.mean(), window.mean(axis=0), rtol=1e-12)
+        np.testing.assert_allclose(
+            moments.cov(), np.cov(window, rowvar=False), rtol=1e-8, atol=1e-14
+        )
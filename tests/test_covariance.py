@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.covariance import (
+    COVARIANCE_METHODS,
+    compute_covariance,
+    factor_covariance,
+    ledoit_wolf_covariance,
+    sample_covariance,
+)
+
+
+def daily_returns(n_days: int, n_tickers: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(size=(n_tickers, 2))
+    values = rng.normal(size=(n_days, 2)) @ loadings.T + rng.normal(
+        size=(n_days, n_tickers)
+    )
+    return pd.DataFrame(values * 0.01, columns=[f"T{i}" for i in range(n_tickers)])
+
+
+def gapped(returns: pd.DataFrame) -> pd.DataFrame:
+    """A late listing and a suspension, as left NaN by align_prices."""
+    returns = returns.copy()
+    returns.iloc[:200, 0] = np.nan
+    returns.iloc[300:340, 1] = np.nan
+    return returns
+
+
+def test_sample_matches_numpy():
+    returns = daily_returns(500, 5)
+    np.testing.assert_allclose(
+        sample_covariance(returns).to_frame(),
+        np.cov(returns, rowvar=False) * 252,
+        rtol=1e-10,
+    )
+
+
+@pytest.mark.parametrize("shape", [(500, 5), (40, 60)])
+def test_ledoit_wolf_matches_sklearn(shape):
+    sklearn_covariance = pytest.importorskip("sklearn.covariance")
+    returns = daily_returns(*shape)
+    expected = sklearn_covariance.LedoitWolf().fit(returns.to_numpy()).covariance_
+    np.testing.assert_allclose(
+        ledoit_wolf_covariance(returns).to_frame(),
+        expected * 252,
+        rtol=1e-8,
+        atol=1e-14,
+    )
+
+
+def test_factor_keeps_the_sample_variances():
+    returns = daily_returns(500, 12)
+    np.testing.assert_allclose(
+        factor_covariance(returns, n_factors=3).diagonal(),
+        sample_covariance(returns).diagonal(),
+        rtol=1e-10,
+    )
+
+
+def test_gaps_use_each_pairs_overlap():
+    returns = gapped(daily_returns(500, 5))
+    # Each column is centered on its own mean, each pair summed over its overlap.
+    centered = returns - returns.mean()
+    expected = pd.DataFrame(
+        {
+            a: {
+                b: (centered[a] * centered[b]).sum()
+                / ((returns[a].notna() & returns[b].notna()).sum() - 1)
+                for b in returns
+            }
+            for a in returns
+        }
+    )
+    np.testing.assert_allclose(
+        sample_covariance(returns).to_frame(), expected * 252, rtol=1e-8
+    )
+
+
+@pytest.mark.parametrize("method", COVARIANCE_METHODS)
+def test_gaps_give_a_valid_covariance(method):
+    returns = gapped(daily_returns(500, 5))
+    matrix = compute_covariance(returns, method).to_frame().to_numpy()
+
+    assert np.isfinite(matrix).all()
+    np.testing.assert_allclose(matrix, matrix.T, atol=1e-14)
+    assert np.linalg.eigvalsh(matrix).min() >= -1e-12
+    # Every variance comes from the days the ticker has.
+    np.testing.assert_allclose(np.diag(matrix) / (returns.var() * 252), 1, rtol=0.2)
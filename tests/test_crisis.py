@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from src.services.crisis import crisis_analytics, load_crisis_events, snap_events
+from src.services.result_cache import result_cache
+from src.services.tracing import trace
+
+
+def values() -> pd.DataFrame:
+    index = pd.bdate_range("2019-01-01", "2023-12-29")
+    growth = np.linspace(0, 1, len(index))
+    return pd.DataFrame({"A": 1 + growth, "B": 1 + growth**2}, index=index)
+
+
+def test_default_and_explicit_catalogue_share_a_cache_entry():
+    result_cache.clear()
+    with trace() as current:
+        # The CLI leaves the events out, the dashboard passes the catalogue.
+        default = crisis_analytics(values())
+        explicit = crisis_analytics(values(), load_crisis_events())
+
+    assert current.counters["result_cache.miss"] == 1
+    assert current.counters["result_cache.hit"] == 1
+    pd.testing.assert_frame_equal(default, explicit)
+
+
+def test_events_snap_to_trading_days():
+    index = pd.bdate_range("2020-01-01", "2020-12-31")
+    events = pd.DataFrame(
+        {
+            "stress_event": ["weekend", "exact", "before", "after", "no days"],
+            "start_date": pd.to_datetime(
+                ["2020-03-07", "2020-06-01", "2019-06-01", "2020-11-02", "2020-07-04"]
+            ),
+            "end_date": pd.to_datetime(
+                ["2020-03-22", "2020-06-30", "2020-02-01", "2021-02-01", "2020-07-05"]
+            ),
+        }
+    )
+    snapped = snap_events(index, events)
+
+    # Saturday and Sunday snap back to the Friday before them.
+    assert list(snapped.index) == ["weekend", "exact"]
+    assert index[snapped.loc["weekend", "start"]] == pd.Timestamp("2020-03-06")
+    assert index[snapped.loc["weekend", "end"]] == pd.Timestamp("2020-03-20")
+    assert index[snapped.loc["exact", "start"]] == pd.Timestamp("2020-06-01")
+    assert index[snapped.loc["exact", "end"]] == pd.Timestamp("2020-06-30")
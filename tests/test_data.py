@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from src.services.data import align_prices
+
+
+def test_align_prices_fills_only_short_gaps():
+    index = pd.bdate_range("2024-01-01", periods=12)
+    close = pd.Series(np.arange(1.0, 13.0), index=index)
+    close.iloc[[2, 3]] = np.nan  # two days closed
+    close.iloc[5:9] = np.nan  # a four day suspension
+    late = pd.Series(np.nan, index=index)
+    late.iloc[2:] = 1.0  # listed on the third day
+    aligned = align_prices(pd.DataFrame({"A": close, "B": late}), max_gap=3)
+
+    expected = [1, 2, 2, 2, 5, np.nan, np.nan, np.nan, np.nan, 10, 11, 12]
+    np.testing.assert_array_equal(aligned["A"], expected)
+    assert aligned["B"].iloc[:2].isna().all()
+
+
+def test_align_prices_fills_a_short_trailing_gap():
+    index = pd.bdate_range("2024-01-01", periods=6)
+    price_df = pd.DataFrame(
+        {"US": 1.0, "L": [1.0, 2.0, 3.0, 4.0, 5.0, np.nan]}, index=index
+    )
+    assert align_prices(price_df, max_gap=1)["L"].iloc[-1] == 5.0
+    assert np.isnan(align_prices(price_df, max_gap=0)["L"].iloc[-1])
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.services import monte_carlo
+from src.services.fit_cache import FitCache
+from src.services.price_cache import fixture_downloader
+from src.services.tracing import trace
+
+
+@pytest.fixture
+def fits(tmp_path, monkeypatch):
+    cache = FitCache(tmp_path)
+    monkeypatch.setattr(monte_carlo, "fit_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def spy(price_fixtures):
+    return fixture_downloader(price_fixtures)(
+        "SPY", pd.Timestamp("2020-01-01"), pd.Timestamp("2024-01-01")
+    )
+
+
+def fit_counters(prices):
+    with trace() as current:
+        fit = monte_carlo.fit_garch(prices)
+    return fit, {
+        name: n for name, n in current.counters.items() if name.startswith("fit_cache")
+    }
+
+
+def test_same_window_is_a_hit(fits, spy):
+    window = spy["2021-01-01":"2022-12-31"]
+    fit, counters = fit_counters(window)
+    assert counters == {"fit_cache.miss": 1}
+
+    cached_fit, counters = fit_counters(window)
+    assert counters == {"fit_cache.hit": 1}
+    assert cached_fit == fit
+
+
+def test_rolling_window_is_warm_started(fits, spy):
+    fit_counters(spy["2021-01-01":"2022-12-31"])
+    # The next day's default window: one day dropped at the start, one appended.
+    _, counters = fit_counters(spy["2021-01-04":"2023-01-03"])
+    assert counters == {"fit_cache.miss": 1, "fit_cache.warm": 1}
+
+
+def test_disjoint_window_is_fitted_cold(fits, spy):
+    fit_counters(spy["2020-01-01":"2020-12-31"])
+    _, counters = fit_counters(spy["2022-01-01":"2023-12-31"])
+    assert counters == {"fit_cache.miss": 1}
+
+
+def test_latest_skips_entries_evicted_meanwhile(tmp_path, monkeypatch):
+    cache = FitCache(tmp_path)
+    cache.put("lineage", "a", {"fit": 1})
+    stat = Path.stat
+
+    def evicted(path, **kwargs):
+        if path.name.startswith("lineage-"):
+            raise FileNotFoundError(path)
+        return stat(path, **kwargs)
+
+    monkeypatch.setattr(Path, "stat", evicted)
+    assert cache.latest("lineage") is None
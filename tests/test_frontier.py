@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pypfopt import EfficientFrontier
+
+from src.services.covariance import Covariance
+from src.services.frontier import (
+    frontier_from_moments,
+    max_sharpe_weights,
+    min_volatility_weights,
+)
+
+
+@pytest.fixture
+def moments():
+    rng = np.random.default_rng(3)
+    tickers = pd.Index([f"T{i}" for i in range(6)])
+    loadings = rng.normal(size=(6, 2))
+    returns = (
+        rng.normal(size=(1000, 2)) @ loadings.T + rng.normal(size=(1000, 6))
+    ) * 0.01
+    cov = pd.DataFrame(
+        np.cov(returns, rowvar=False) * 252, index=tickers, columns=tickers
+    )
+    mean = pd.Series(np.linspace(0.02, 0.12, 6), index=tickers)
+    return mean, cov
+
+
+def pypfopt_weights(mean, cov, method, **kwargs) -> np.ndarray:
+    frontier = EfficientFrontier(mean, cov)
+    getattr(frontier, method)(**kwargs)
+    return pd.Series(frontier.weights, index=mean.index).to_numpy()
+
+
+def test_min_volatility_matches_pypfopt(moments):
+    mean, cov = moments
+    weights = min_volatility_weights(mean.to_numpy(), Covariance.from_matrix(cov))
+    np.testing.assert_allclose(
+        weights, pypfopt_weights(mean, cov, "min_volatility"), atol=1e-4
+    )
+
+
+def test_max_sharpe_matches_pypfopt(moments):
+    mean, cov = moments
+    weights = max_sharpe_weights(mean.to_numpy(), Covariance.from_matrix(cov), 0.03)
+    np.testing.assert_allclose(
+        weights,
+        pypfopt_weights(mean, cov, "max_sharpe", risk_free_rate=0.03),
+        atol=1e-4,
+    )
+
+
+def test_frontier_endpoints_match_pypfopt(moments):
+    mean, cov = moments
+    frontier = frontier_from_moments(
+        mean, Covariance.from_matrix(cov), n_points=50, risk_free_rate=0.03
+    )
+
+    np.testing.assert_allclose(
+        frontier.min_variance, pypfopt_weights(mean, cov, "min_volatility"), atol=1e-4
+    )
+    np.testing.assert_allclose(
+        frontier.tangency,
+        pypfopt_weights(mean, cov, "max_sharpe", risk_free_rate=0.03),
+        atol=1e-4,
+    )
+    # The last target is the highest-returning asset alone.
+    np.testing.assert_allclose(frontier.weights.iloc[:, -1], np.eye(6)[-1], atol=1e-6)
+    assert frontier.returns.is_monotonic_increasing
+    assert frontier.sharpe_ratios.max() <= (
+        (mean @ frontier.tangency - 0.03)
+        / np.sqrt(frontier.tangency @ cov @ frontier.tangency)
+        + 1e-9
+    )
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from src.services.metrics import calculate_batch_performance_metrics
+
+
+def test_batch_metrics_match_each_portfolio_alone():
+    rng = np.random.default_rng(3)
+    index = pd.bdate_range("2022-01-03", periods=300)
+    price_df = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(300, 3)), axis=0)),
+        index=index,
+        columns=["A", "B", "C"],
+    )
+    price_df.iloc[:40, 2] = np.nan  # C listed later
+    weights = pd.DataFrame(rng.dirichlet(np.ones(3), size=5).T, index=price_df.columns)
+    weights.iloc[2, :2] = 0  # two portfolios without C
+    weights /= weights.sum()
+    rates = pd.Series(np.linspace(0.01, 0.04, 300), index=index)
+
+    batch = calculate_batch_performance_metrics(price_df, weights, rates, chunk_size=2)
+
+    for portfolio, w in weights.items():
+        held = w[w != 0].index
+        values = price_df[held] @ w[held]
+        returns = values.pct_change(fill_method=None).dropna()
+        log_returns = np.log1p(returns)
+        excess = log_returns - rates.loc[returns.index] / 252
+        annual = (1 + returns).prod() ** (252 / len(returns)) - 1
+        drawdown = (values / values.cummax() - 1).min()
+        expected = {
+            "Annualized Return": annual,
+            "Annualized Volatility": log_returns.std() * np.sqrt(252),
+            "Sharpe Ratio": excess.mean() / excess.std() * np.sqrt(252),
+            "Sortino Ratio": excess.mean() / excess[excess < 0].std() * np.sqrt(252),
+            "Max Drawdown": drawdown,
+            "Calmar Ratio": annual / abs(drawdown),
+        }
+        np.testing.assert_allclose(
+            batch[portfolio], pd.Series(expected)[batch.index], rtol=1e-10
+        )
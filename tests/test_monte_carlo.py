@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.covariance import Covariance
+from src.services.monte_carlo import (
+    GarchFit,
+    _draw_correlated_innovations,
+    _summarize,
+    get_stats,
+    get_stats_streaming,
+    risk_statistics,
+    seed_sequence,
+    simulate_log_paths,
+)
+
+
+def test_rare_event_errors_do_not_collapse():
+    rng = np.random.default_rng(0)
+    cum_returns = rng.uniform(0.1, 2.0, size=(1, 1000))
+    cum_returns[0, [3, 400, 401, 950]] = -0.1
+    cum_returns_3y = rng.uniform(-0.2, 1.0, size=(1, 1000))
+    # Antithetic pairs: the units are pairs of paths.
+    units = np.arange(1000) // 2
+    stats = _summarize(
+        cum_returns, cum_returns_3y, 2520, pd.Index(["P0"]), units=units
+    )["P0"]
+
+    assert stats["10y_shortfall"] == 4 / 1000
+    # The error of the Agresti-Coull interval over all paths.
+    n = 1000 + 1.96**2
+    p = (4 + 1.96**2 / 2) / n
+    assert np.isclose(stats["10y_shortfall_se"], np.sqrt(p * (1 - p) / n))
+    assert stats["prob_3y_loss"] == 0
+    assert stats["prob_3y_loss_se"] > 0
+
+
+def test_risk_statistics_match_numpy():
+    returns = np.random.default_rng(1).standard_t(4, size=(3, 1001)) * 0.1
+    stats = risk_statistics(
+        returns, quantiles=(0.05, 0.25, 0.5, 0.9), tail_levels=(0.05, 0.01)
+    )
+
+    np.testing.assert_array_equal(stats["min"], returns.min(axis=1))
+    np.testing.assert_array_equal(stats["max"], returns.max(axis=1))
+    for name, level in [("p5", 5), ("p25", 25), ("median", 50), ("p90", 90)]:
+        np.testing.assert_array_equal(
+            stats[name], np.percentile(returns, level, axis=1)
+        )
+    for suffix, level in [("", 5), ("_p1", 1)]:
+        var = np.percentile(returns, level, axis=1)
+        np.testing.assert_array_equal(stats[f"var{suffix}"], var)
+        cvar = [
+            row[row <= value].mean() for row, value in zip(returns, var, strict=True)
+        ]
+        np.testing.assert_allclose(stats[f"cvar{suffix}"], cvar, rtol=1e-12)
+
+
+@pytest.mark.parametrize("factor_form", [False, True])
+def test_correlated_innovations_match_their_target(factor_form):
+    fits = [
+        GarchFit(
+            0,
+            0,
+            0,
+            0,
+            t_df=df,
+            t_loc=0,
+            t_scale=1,
+            last_resid=0,
+            last_vol=0,
+            last_price=1,
+        )
+        for df in (4.5, 8.0, 30.0)
+    ]
+    loadings = np.array([[0.8], [0.6], [-0.5]])
+    target = Covariance(pd.RangeIndex(3), loadings, 1 - np.sum(loadings**2, axis=1))
+    corr = target if factor_form else target.to_frame().to_numpy()
+    out = np.empty((500, 3, 400))
+    _draw_correlated_innovations(seed_sequence(0), fits, corr, out)
+
+    draws = out.transpose(1, 0, 2).reshape(3, -1)
+    np.testing.assert_allclose(np.corrcoef(draws), target.to_frame(), atol=0.01)
+
+
+def test_log_paths_follow_the_garch_recursion():
+    fit = GarchFit(0.05, 0.02, 0.1, 0.85, 5.0, 0.0, 0.8, 0.5, 1.2, 100.0)
+    z = np.random.default_rng(2).standard_t(5, size=(30, 4))
+    log_paths = simulate_log_paths(fit, 4, 30, innovations=z)
+
+    eps, sigma2 = np.full(4, fit.last_resid), np.full(4, fit.last_vol**2)
+    expected = [np.zeros(4)]
+    for t in range(30):
+        sigma2 = fit.omega + fit.alpha * eps**2 + fit.beta * sigma2
+        eps = np.sqrt(sigma2) * z[t]
+        expected.append(expected[-1] + np.log1p((fit.mu + eps) / 100))
+    np.testing.assert_allclose(log_paths, expected, rtol=1e-12)
+
+
+def test_streamed_stats_match_the_cube():
+    rng = np.random.default_rng(4)
+    cube = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, size=(3, 800, 400)), axis=1))
+    weights = pd.DataFrame(rng.dirichlet(np.ones(3), size=2).T, columns=["P0", "P1"])
+    pd.testing.assert_frame_equal(
+        get_stats_streaming(np.split(cube, 4, axis=2), weights),
+        get_stats(cube, weights),
+    )
@@ -0,0 +1,151 @@
+import pandas as pd
+import pytest
+
+from src.services.price_cache import (
+    PriceCache,
+    PriceDownloadError,
+    fixture_downloader,
+)
+
+
+class RecordingDownloader:
+    """Serves the fixture closes, recording each call, and fails on demand."""
+
+    def __init__(self, directory):
+        self.download = fixture_downloader(directory)
+        self.calls = []
+        self.failing = False
+
+    def __call__(self, ticker, start, end):
+        self.calls.append((ticker, start, end))
+        if self.failing:
+            # What yfinance returns on a failed or rate-limited request.
+            return pd.Series(dtype=float, name=ticker)
+        return self.download(ticker, start, end)
+
+
+@pytest.fixture
+def downloader(price_fixtures):
+    return RecordingDownloader(price_fixtures)
+
+
+@pytest.fixture
+def cache(tmp_path, downloader):
+    return PriceCache(tmp_path, downloader)
+
+
+def expected(price_fixtures, ticker, start, end):
+    return fixture_downloader(price_fixtures)(
+        ticker, pd.Timestamp(start), pd.Timestamp(end)
+    )
+
+
+def test_sub_range_is_served_from_disk(cache, downloader, price_fixtures):
+    cache.get("SPY", "2021-01-01", "2022-01-01")
+    close = cache.get("SPY", "2021-03-01", "2021-06-01")
+
+    assert len(downloader.calls) == 1
+    pd.testing.assert_series_equal(
+        close, expected(price_fixtures, "SPY", "2021-03-01", "2021-06-01")
+    )
+
+
+def test_wider_range_downloads_only_head_and_tail(cache, downloader, price_fixtures):
+    cache.get("SPY", "2021-01-01", "2022-01-01")
+    close = cache.get("SPY", "2020-06-01", "2022-06-01")
+
+    assert [(start, end) for _, start, end in downloader.calls[1:]] == [
+        # Up to and including the first cached close, 2021-01-01.
+        (pd.Timestamp("2020-06-01"), pd.Timestamp("2021-01-02")),
+        # Coverage ends after the last close returned, 2021-12-31.
+        (pd.Timestamp("2022-01-01"), pd.Timestamp("2022-06-01")),
+    ]
+    pd.testing.assert_series_equal(
+        close, expected(price_fixtures, "SPY", "2020-06-01", "2022-06-01")
+    )
+
+
+def test_empty_download_is_retried(cache, downloader, price_fixtures):
+    downloader.failing = True
+    with pytest.raises(PriceDownloadError):
+        cache.get("TLT", "2022-01-01", "2023-01-01")
+
+    downloader.failing = False
+    close = cache.get("TLT", "2022-01-01", "2023-01-01")
+
+    assert len(downloader.calls) == 2
+    pd.testing.assert_series_equal(
+        close, expected(price_fixtures, "TLT", "2022-01-01", "2023-01-01")
+    )
+
+
+def test_empty_tail_serves_the_cached_closes(cache, downloader, price_fixtures, caplog):
+    cache.get("GLD", "2022-01-01", "2022-07-01")
+    downloader.failing = True
+    close = cache.get("GLD", "2022-01-01", "2023-01-01")
+
+    pd.testing.assert_series_equal(
+        close, expected(price_fixtures, "GLD", "2022-01-01", "2022-07-01")
+    )
+    assert "No closes downloaded for GLD" in caplog.text
+
+    downloader.failing = False
+    close = cache.get("GLD", "2022-01-01", "2023-01-01")
+
+    assert downloader.calls[-1][1:] == (
+        pd.Timestamp("2022-07-01"),
+        pd.Timestamp("2023-01-01"),
+    )
+    pd.testing.assert_series_equal(
+        close, expected(price_fixtures, "GLD", "2022-01-01", "2023-01-01")
+    )
+
+
+def test_quiet_days_are_not_a_failure(cache, downloader):
+    cache.get("SPY", "2022-12-01", "2022-12-24")
+    # 2022-12-26 was a market holiday: a one-weekday tail may be empty.
+    downloader.failing = True
+    close = cache.get("SPY", "2022-12-01", "2022-12-27")
+
+    assert close.index.max() == pd.Timestamp("2022-12-23")
+
+
+def test_history_before_listing_is_not_an_error(cache, downloader, price_fixtures):
+    cache.get("IBIT", "2021-07-01", "2022-01-01")
+    close = cache.get("IBIT", "2021-01-01", "2022-01-01")
+
+    pd.testing.assert_series_equal(
+        close, expected(price_fixtures, "IBIT", "2021-01-01", "2022-01-01")
+    )
+    assert close.index.min() == pd.Timestamp("2021-06-01")
+
+
+def test_listing_date_is_recorded_once_verified(cache, downloader, price_fixtures):
+    cache.get("IBIT", "2021-06-01", "2022-01-01")
+    close = cache.get("IBIT", "2020-01-01", "2022-01-01")
+    # The head holds the first cached close and nothing earlier.
+    assert downloader.calls[-1][1:] == (
+        pd.Timestamp("2020-01-01"),
+        pd.Timestamp("2021-06-02"),
+    )
+
+    n_calls = len(downloader.calls)
+    earlier = cache.get("IBIT", "2019-01-01", "2022-01-01")
+    assert len(downloader.calls) == n_calls
+    pd.testing.assert_series_equal(close, earlier)
+    pd.testing.assert_series_equal(
+        earlier, expected(price_fixtures, "IBIT", "2019-01-01", "2022-01-01")
+    )
+
+
+def test_failed_head_is_not_taken_for_a_listing(cache, downloader):
+    cache.get("IBIT", "2021-06-01", "2022-01-01")
+    downloader.failing = True
+    cache.get("IBIT", "2020-01-01", "2022-01-01")
+    downloader.failing = False
+    cache.get("IBIT", "2020-01-01", "2022-01-01")
+
+    # Tried again after the failure, then recorded.
+    assert len(downloader.calls) == 3
+    cache.get("IBIT", "2020-01-01", "2022-01-01")
+    assert len(downloader.calls) == 3
@@ -0,0 +1,44 @@
+import os
+import time
+
+from src.services.result_cache import (
+    _LOCK_FILE_MAX_AGE,
+    MISSING,
+    ResultCache,
+    cached,
+    result_cache,
+)
+
+
+def test_bypassed_calls_are_always_computed():
+    calls = []
+
+    @cached(persist=False, bypass=lambda arguments: arguments["seed"] is None)
+    def draw(n: int, seed: int | None = 0) -> int:
+        calls.append(seed)
+        return len(calls)
+
+    result_cache.clear()
+    assert draw(3) == draw(3) == 1
+    assert draw(3, seed=None) == 2
+    assert draw(3, seed=None) == 3
+    assert draw.peek(3, seed=None) is MISSING
+    assert draw.peek(3) == 1
+
+
+def test_key_locks_are_released(tmp_path):
+    cache = ResultCache(tmp_path)
+    with cache.lock("a"), cache.lock("b"):
+        assert set(cache._key_locks) == {"a", "b"}
+    assert not cache._key_locks
+
+
+def test_trim_keeps_held_lock_files(tmp_path):
+    cache = ResultCache(tmp_path)
+    stale = time.time() - 2 * _LOCK_FILE_MAX_AGE
+    with cache.lock("held"):
+        (tmp_path / "locks" / "idle.lock").touch()
+        for name in ("held", "idle"):
+            os.utime(tmp_path / "locks" / f"{name}.lock", (stale, stale))
+        cache.set("key", 1, ttl=60)
+        assert [path.stem for path in (tmp_path / "locks").iterdir()] == ["held"]
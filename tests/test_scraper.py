@@ -0,0 +1,132 @@
+import hashlib
+import threading
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from src.services.analysis import CORE_PORTFOLIOS
+from src.services.scraper import CorePortfolioScraper, parse_portfolio_page
+from src.services.tracing import trace
+
+_URL_PREFIX = "https://www.syfe.com/core/"
+
+
+class RecordedPages(BaseAdapter):
+    """
+    Serves the recorded core portfolio pages with an ETag, answering 304 to a
+    matching ``If-None-Match``, and records each request. Raises a
+    ``ConnectionError`` while ``failing``.
+    """
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        self.requests = []
+        self.threads = set()
+        self.failing = False
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.requests.append(request)
+            self.threads.add(threading.current_thread().name)
+        if self.failing:
+            raise requests.ConnectionError("offline")
+        body = (
+            self.directory / f"{request.url.removeprefix(_URL_PREFIX)}.html"
+        ).read_bytes()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.headers["ETag"] = etag
+        if request.headers.get("If-None-Match") == etag:
+            response.status_code = 304
+            response._content = b""
+        else:
+            response.status_code = 200
+            response._content = body
+            response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def pages(core_portfolio_fixtures):
+    return RecordedPages(core_portfolio_fixtures)
+
+
+def online_scraper(directory, pages, ttl=3600):
+    scraper = CorePortfolioScraper(directory, ttl=ttl)
+    scraper._session.mount("https://", pages)
+    return scraper
+
+
+def expected(core_portfolio_fixtures):
+    return {
+        name: parse_portfolio_page(
+            (core_portfolio_fixtures / f"{name}.html").read_text()
+        )
+        for name in CORE_PORTFOLIOS
+    }
+
+
+def test_fixture_dir_serves_every_core_portfolio(tmp_path, core_portfolio_fixtures):
+    offline = CorePortfolioScraper(tmp_path, fixture_dir=core_portfolio_fixtures)
+    data = offline.get_many(CORE_PORTFOLIOS)
+
+    for name, key in CORE_PORTFOLIOS.items():
+        assert sum(data[name]["etfAllocation"][key].values()) == pytest.approx(1)
+
+
+def test_concurrent_fetches_join_the_trace(tmp_path, pages, core_portfolio_fixtures):
+    with trace() as current:
+        data = online_scraper(tmp_path, pages).get_many(CORE_PORTFOLIOS)
+
+    assert data == expected(core_portfolio_fixtures)
+    fetches = [span for span in current.spans if span.name == "scraper.fetch"]
+    assert sorted(span.attrs["portfolio"] for span in fetches) == sorted(
+        CORE_PORTFOLIOS
+    )
+    assert {span.attrs["status"] for span in fetches} == {200}
+    assert current.counters["scraper.miss"] == len(CORE_PORTFOLIOS)
+    assert threading.current_thread().name not in pages.threads
+
+
+def test_fresh_data_is_served_from_disk(tmp_path, pages):
+    online_scraper(tmp_path, pages).get_many(CORE_PORTFOLIOS)
+    with trace() as current:
+        online_scraper(tmp_path, pages).get_many(CORE_PORTFOLIOS)
+
+    assert len(pages.requests) == len(CORE_PORTFOLIOS)
+    assert current.counters["scraper.hit"] == len(CORE_PORTFOLIOS)
+
+
+def test_expired_data_is_revalidated(tmp_path, pages, core_portfolio_fixtures):
+    online_scraper(tmp_path, pages, ttl=0).get_many(CORE_PORTFOLIOS)
+    with trace() as current:
+        data = online_scraper(tmp_path, pages, ttl=0).get_many(CORE_PORTFOLIOS)
+
+    assert data == expected(core_portfolio_fixtures)
+    assert all(
+        "If-None-Match" in request.headers
+        for request in pages.requests[len(CORE_PORTFOLIOS) :]
+    )
+    assert current.counters["scraper.revalidated"] == len(CORE_PORTFOLIOS)
+
+
+def test_failed_fetch_serves_the_last_data(tmp_path, pages, core_portfolio_fixtures):
+    online_scraper(tmp_path, pages, ttl=0).get_many(CORE_PORTFOLIOS)
+    pages.failing = True
+    with trace() as current:
+        data = online_scraper(tmp_path, pages, ttl=0).get_many(CORE_PORTFOLIOS)
+
+    assert data == expected(core_portfolio_fixtures)
+    assert current.counters["scraper.stale"] == len(CORE_PORTFOLIOS)
+
+    with pytest.raises(requests.ConnectionError):
+        online_scraper(tmp_path / "empty", pages).get("equity100")
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from src.services.covariance import Covariance
+from src.services.strategy import risk_parity_weights
+
+
+def random_covariance(n_assets: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(size=(n_assets, 3))
+    returns = rng.normal(size=(500, 3)) @ loadings.T + rng.normal(size=(500, n_assets))
+    return np.cov(returns * 0.01, rowvar=False) * 252
+
+
+def risk_contributions(weights: np.ndarray, cov: np.ndarray) -> np.ndarray:
+    contributions = weights * (cov @ weights)
+    return contributions / contributions.sum()
+
+
+@pytest.mark.parametrize("n_assets", [2, 10, 200])
+def test_risk_contributions_are_equal(n_assets):
+    cov = random_covariance(n_assets)
+    weights = risk_parity_weights(cov)
+
+    assert weights.sum() == pytest.approx(1)
+    assert (weights > 0).all()
+    # The Newton decrement tolerance bounds the error near 1e-6.
+    np.testing.assert_allclose(
+        risk_contributions(weights, cov), 1 / n_assets, atol=1e-6
+    )
+
+
+def test_risk_contributions_follow_the_budget():
+    cov = random_covariance(5)
+    budget = np.array([0.4, 0.3, 0.1, 0.1, 0.1])
+    weights = risk_parity_weights(cov, risk_budget=budget)
+
+    np.testing.assert_allclose(risk_contributions(weights, cov), budget, atol=1e-6)
+
+
+def test_factor_form_gives_the_dense_solution():
+    cov = random_covariance(8)
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    loadings = eigenvectors[:, -3:] * np.sqrt(eigenvalues[-3:])
+    specific = np.diag(cov - loadings @ loadings.T)
+    factor = Covariance(np.arange(8), loadings, specific)
+
+    np.testing.assert_allclose(
+        risk_parity_weights(factor),
+        risk_parity_weights(factor.to_frame().to_numpy()),
+        rtol=1e-8,
+    )
@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.services import data
+from src.services.price_cache import PriceCache, fixture_downloader
+from src.services.result_cache import result_cache
+from src.services.tracing import count, map_in_context, span, trace
+
+
+@pytest.fixture
+def prices(tmp_path, price_fixtures, monkeypatch):
+    monkeypatch.setattr(
+        data, "price_cache", PriceCache(tmp_path, fixture_downloader(price_fixtures))
+    )
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+
+def test_map_in_context_records_into_the_callers_trace():
+    def work(item):
+        with span("work", item=item):
+            count("work.done")
+        return threading.current_thread().name
+
+    with (
+        trace() as current,
+        span("outer"),
+        ThreadPoolExecutor(max_workers=2) as pool,
+    ):
+        threads = map_in_context(pool, work, range(4))
+
+    assert all(name != threading.current_thread().name for name in threads)
+    assert current.counters["work.done"] == 4
+    workers = [record for record in current.spans if record.name == "work"]
+    assert sorted(record.attrs["item"] for record in workers) == [0, 1, 2, 3]
+    assert {record.depth for record in workers} == {1}
+
+
+def test_concurrent_downloads_join_the_trace(prices):
+    with trace() as current:
+        data.get_prices(("SPY", "TLT", "GLD"), "2021-01-01", "2022-01-01")
+    downloads = [span for span in current.spans if span.name == "price_cache.download"]
+    assert sorted(span.attrs["ticker"] for span in downloads) == ["GLD", "SPY", "TLT"]
+    assert current.counters["price_cache.miss"] == 3
+    assert current.counters["result_cache.miss"] == 3
+
+    result_cache.clear()
+    with trace() as current:
+        data.get_prices(("SPY", "TLT", "GLD"), "2021-03-01", "2021-06-01")
+    assert current.counters["price_cache.hit"] == 3
+    assert not [span for span in current.spans if span.name == "price_cache.download"]